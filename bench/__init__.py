@@ -0,0 +1,4 @@
+"""
+Benchmarks for `conflex`. Not a part of the distribution, run from the repository root, for example:
+`python -m bench.mem` for memory taken by the schema or `python -m bench.run` for timings of the hot paths.
+"""
@@ -0,0 +1,133 @@
+"""
+Generators of synthetic schemas for the benchmarks.
+"""
+from typing import List
+
+import conflex as m_c
+
+# Option classes used by generated schemas in round-robin order.
+gl_opt_factory: list = [
+    lambda: m_c.OptValue(iv_default='value'),
+    lambda: m_c.OptVInt(iv_default='1KB'),
+    lambda: m_c.OptVFloat(iv_default='0.5'),
+    lambda: m_c.OptVChoice({'on': True, 'off': False}, iv_default='off'),
+    lambda: m_c.OptLInt(iv_default=[1, 2, 3]),
+]
+
+
+def schema_create(iv_section_cnt: int, iv_option_cnt: int) -> List[m_c.NodeAbc]:
+    """Create flat schema of `iv_section_cnt` sections with `iv_option_cnt` options in each one.
+
+    :return: list of section definitions suitable for `conflex.Config`.
+    """
+    l_ret: list = []
+    for v_sect_idx in range(iv_section_cnt):
+        l_ret.append(
+            f'section{v_sect_idx}' >> m_c.Section() << [
+                f'option{v_opt_idx}' >> gl_opt_factory[v_opt_idx % len(gl_opt_factory)]()
+                for v_opt_idx in range(iv_option_cnt)])
+    return l_ret
+
+
+# Raw source values matching `gl_opt_factory` by index, `iv_layer_idx` makes layers differ.
+gl_opt_raw: list = [
+    lambda iv_layer_idx: f'value{iv_layer_idx}',
+    lambda iv_layer_idx: f'{iv_layer_idx + 1}KB',
+    lambda iv_layer_idx: f'{iv_layer_idx}.25',
+    lambda iv_layer_idx: 'on' if iv_layer_idx % 2 == 0 else 'off',
+    lambda iv_layer_idx: [iv_layer_idx, 2, 3],
+]
+
+
+class Shape:
+    """
+    Size of a generated config: `section_cnt` top sections, each one is a chain of `depth` nested sections with
+    `width` options on every level. When `list_width` is positive every top section also has the `items` list with
+    `list_size` items of `list_width` options each.
+    """
+    __slots__ = ('section_cnt', 'width', 'depth', 'list_width', 'list_size', 'layer_cnt')
+
+    def __init__(
+            self, iv_section_cnt: int = 10, iv_width: int = 10, iv_depth: int = 3, iv_list_width: int = 4,
+            iv_list_size: int = 100, iv_layer_cnt: int = 3):
+        self.section_cnt = iv_section_cnt
+        self.width = iv_width
+        self.depth = iv_depth
+        self.list_width = iv_list_width
+        self.list_size = iv_list_size
+        self.layer_cnt = iv_layer_cnt
+
+    def as_dict(self) -> dict:
+        return {v: getattr(self, v) for v in self.__slots__}
+
+    def option_cnt(self) -> int:
+        return self.section_cnt * (self.width * self.depth + (self.list_width + 1 if self.list_width > 0 else 0))
+
+
+def _level_schema_create(iv_shape: Shape, iv_depth: int) -> List[m_c.NodeAbc]:
+    l_ret: list = [
+        f'option{v_opt_idx}' >> gl_opt_factory[v_opt_idx % len(gl_opt_factory)]()
+        for v_opt_idx in range(iv_shape.width)]
+    if iv_depth > 1:
+        l_ret.append('nested' >> m_c.Section() << _level_schema_create(iv_shape, iv_depth - 1))
+    return l_ret
+
+
+def schema_tree_create(iv_shape: Shape) -> List[m_c.NodeAbc]:
+    """Create schema of the `iv_shape` size.
+
+    :return: list of section definitions suitable for `conflex.Config`.
+    """
+    l_ret: list = []
+    for v_sect_idx in range(iv_shape.section_cnt):
+        l_child: list = _level_schema_create(iv_shape, iv_shape.depth)
+        if iv_shape.list_width > 0:
+            l_child.append('items' >> m_c.OptList(iv_default=[]) << [
+                f'field{v_idx}' >> gl_opt_factory[v_idx % 4]() for v_idx in range(iv_shape.list_width)])
+        l_ret.append(f'section{v_sect_idx}' >> m_c.Section() << l_child)
+    return l_ret
+
+
+def _level_source_create(iv_shape: Shape, iv_depth: int, iv_sect_idx: int, iv_layer_idx: int) -> dict:
+    l_ret: dict = {}
+    for v_opt_idx in range(iv_shape.width):
+        # The bottom layer has every option, every upper layer overrides a share of them.
+        if iv_layer_idx == 0 or (v_opt_idx + iv_sect_idx + iv_depth) % iv_shape.layer_cnt == iv_layer_idx:
+            l_ret[f'option{v_opt_idx}'] = gl_opt_raw[v_opt_idx % len(gl_opt_raw)](iv_layer_idx)
+    if iv_depth > 1:
+        l_ret['nested'] = _level_source_create(iv_shape, iv_depth - 1, iv_sect_idx, iv_layer_idx)
+    return l_ret
+
+
+def source_create(iv_shape: Shape, iv_layer_idx: int) -> dict:
+    """Create source tree of the `iv_layer_idx` layer. The list is defined in the bottom layer only.
+
+    :return: raw config tree suitable for `conflex.Config.load_dicts`.
+    """
+    l_ret: dict = {}
+    for v_sect_idx in range(iv_shape.section_cnt):
+        l_sect: dict = _level_source_create(iv_shape, iv_shape.depth, v_sect_idx, iv_layer_idx)
+        if iv_layer_idx == 0 and iv_shape.list_width > 0:
+            l_sect['items'] = [
+                {'v': f'item{v_item_idx}', **{
+                    f'field{v_idx}': gl_opt_raw[v_idx % 4](v_item_idx) for v_idx in range(iv_shape.list_width)}}
+                for v_item_idx in range(iv_shape.list_size)]
+        l_ret[f'section{v_sect_idx}'] = l_sect
+    return l_ret
+
+
+def sources_create(iv_shape: Shape) -> List[dict]:
+    """
+    :return: `iv_shape.layer_cnt` source trees, the bottom layer first.
+    """
+    return [source_create(iv_shape, v_idx) for v_idx in range(iv_shape.layer_cnt)]
+
+
+def path_depth_list(iv_shape: Shape, iv_depth: int) -> List[str]:
+    """
+    :return: paths of all the options which are `iv_depth` levels deep (1 for the options of the top sections).
+    """
+    v_mid: str = 'nested/' * (iv_depth - 1)
+    return [
+        f'section{v_sect_idx}/{v_mid}option{v_opt_idx}'
+        for v_sect_idx in range(iv_shape.section_cnt) for v_opt_idx in range(iv_shape.width)]
@@ -0,0 +1,38 @@
+"""
+Memory taken by the schema: bytes per option of the parser created by `_parser_dict_create`.
+"""
+import argparse as m_arg
+import gc as m_gc
+import json as m_json
+import tracemalloc as m_tm
+
+from conflex.main import _parser_dict_create
+from bench.gen import schema_create
+
+
+def schema_size_measure(iv_section_cnt: int, iv_option_cnt: int) -> dict:
+    m_gc.collect()
+    m_tm.start()
+    v_mem_0, _ = m_tm.get_traced_memory()
+    l_parser: dict = _parser_dict_create(schema_create(iv_section_cnt, iv_option_cnt))
+    m_gc.collect()
+    v_mem_1, _ = m_tm.get_traced_memory()
+    m_tm.stop()
+    v_opt_cnt: int = len(l_parser)
+    return {
+        'name': 'schema_memory',
+        'option_count': v_opt_cnt,
+        'bytes': v_mem_1 - v_mem_0,
+        'bytes_per_option': (v_mem_1 - v_mem_0) / v_opt_cnt}
+
+
+def main():
+    v_arg = m_arg.ArgumentParser(description=__doc__)
+    v_arg.add_argument('--sections', type=int, default=1000)
+    v_arg.add_argument('--options', type=int, default=100, help='options per section')
+    v_args = v_arg.parse_args()
+    print(m_json.dumps(schema_size_measure(v_args.sections, v_args.options)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Timings of the hot paths of `conflex.Config` on a generated config, printed as JSON. Pass a previous result with
+`--baseline` to get the ratio of every case to it, for example:
+`python -m bench.run --out before.json` and later `python -m bench.run --baseline before.json`.
+"""
+import argparse as m_arg
+import gc as m_gc
+import json as m_json
+import platform as m_pf
+import re as m_re
+import statistics as m_stat
+import time as m_time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import conflex as m_c
+from conflex.main import _parser_dict_create
+from bench.gen import Shape, path_depth_list, schema_tree_create, sources_create
+
+
+class Context:
+    """Inputs shared by the cases, created once per run."""
+    __slots__ = ('shape', 'tree', 'schema', 'sources')
+
+    def __init__(self, iv_shape: Shape):
+        self.shape = iv_shape
+        self.tree = schema_tree_create(iv_shape)
+        self.schema = m_c.Schema(self.tree)
+        self.sources = sources_create(iv_shape)
+
+    def config_create(self, iv_frozen: bool = False) -> m_c.Config:
+        v_ret = m_c.Config(self.schema)
+        v_ret.load_dicts(self.sources, iv_frozen=iv_frozen)
+        return v_ret
+
+
+# Case takes the context and returns the measured call and the count of operations it does. Case is prepared again
+# before every repeat, so the measured call can rely on the cold state.
+CaseFn = Callable[[Context], Tuple[Callable[[], object], int]]
+gl_case: Dict[str, CaseFn] = {}
+
+
+def case(iv_name: str):
+    def decorator(iv_fn: CaseFn) -> CaseFn:
+        gl_case[iv_name] = iv_fn
+        return iv_fn
+    return decorator
+
+
+@case('parser_create')
+def _parser_create(iv_ctx: Context):
+    return lambda: _parser_dict_create(iv_ctx.tree), iv_ctx.shape.option_cnt()
+
+
+@case('config_init')
+def _config_init(iv_ctx: Context):
+    return lambda: m_c.Config(iv_ctx.tree), iv_ctx.shape.option_cnt()
+
+
+@case('load_dicts')
+def _load_dicts(iv_ctx: Context):
+    v_conf = m_c.Config(iv_ctx.schema)
+    return lambda: v_conf.load_dicts(iv_ctx.sources), iv_ctx.shape.layer_cnt
+
+
+@case('freeze')
+def _freeze(iv_ctx: Context):
+    v_conf = iv_ctx.config_create()
+    return v_conf.freeze, iv_ctx.shape.option_cnt()
+
+
+def _get_case_create(iv_depth: int, iv_mode: str) -> CaseFn:
+    def case_get(iv_ctx: Context):
+        v_conf = iv_ctx.config_create(iv_frozen=iv_mode == 'frozen')
+        l_path: list = path_depth_list(iv_ctx.shape, iv_depth)
+        if iv_mode == 'warm':
+            for v_path in l_path:
+                v_conf[v_path]
+        return lambda: [v_conf[v] for v in l_path], len(l_path)
+    return case_get
+
+
+@case('knot')
+def _knot(iv_ctx: Context):
+    v_conf = iv_ctx.config_create()
+    l_path: list = [
+        f'section{v_sect_idx}' + '/nested' * v_depth
+        for v_sect_idx in range(iv_ctx.shape.section_cnt) for v_depth in range(iv_ctx.shape.depth)]
+    return lambda: [v_conf.knot(v) for v in l_path], len(l_path)
+
+
+@case('slice')
+def _slice(iv_ctx: Context):
+    v_conf = iv_ctx.config_create()
+    l_path: list = [f'section{v}/items' for v in range(iv_ctx.shape.section_cnt)]
+
+    def run():
+        return [[v_item['field0'] for v_item in v_conf.slice(v)] for v in l_path]
+    return run, iv_ctx.shape.section_cnt * iv_ctx.shape.list_size
+
+
+@case('items')
+def _items(iv_ctx: Context):
+    v_conf = iv_ctx.config_create()
+    return lambda: list(v_conf.items()), iv_ctx.shape.option_cnt()
+
+
+@case('items_frozen')
+def _items_frozen(iv_ctx: Context):
+    v_conf = iv_ctx.config_create(iv_frozen=True)
+    return lambda: list(v_conf.items()), iv_ctx.shape.option_cnt()
+
+
+@case('items_contains')
+def _items_contains(iv_ctx: Context):
+    v_conf = iv_ctx.config_create()
+    l_pair: list = [(v, v_conf[v]) for v in path_depth_list(iv_ctx.shape, iv_ctx.shape.depth)]
+    v_view = v_conf.items()
+    return lambda: [v in v_view for v in l_pair], len(l_pair)
+
+
+def _case_l_get(iv_shape: Shape) -> Dict[str, CaseFn]:
+    l_ret: dict = {}
+    for v_name, v_fn in gl_case.items():
+        l_ret[v_name] = v_fn
+        if v_name == 'freeze':
+            # Reads go right after the config set up, in the order of the schema depth.
+            for v_mode in ('cold', 'warm', 'frozen'):
+                for v_depth in range(1, iv_shape.depth + 1):
+                    l_ret[f'get_{v_mode}_d{v_depth}'] = _get_case_create(v_depth, v_mode)
+    if iv_shape.list_width <= 0:
+        del l_ret['slice']
+    return l_ret
+
+
+def case_measure(iv_ctx: Context, iv_fn: CaseFn, iv_repeat: int) -> dict:
+    """
+    :return: `best_s` and `median_s` time of the call, `op_ns` nanoseconds per operation of the best one.
+    """
+    l_time: list = []
+    v_op_cnt: int = 0
+    for _ in range(iv_repeat):
+        v_run, v_op_cnt = iv_fn(iv_ctx)
+        m_gc.collect()
+        m_gc.disable()
+        try:
+            v_start: float = m_time.perf_counter()
+            v_run()
+            l_time.append(m_time.perf_counter() - v_start)
+        finally:
+            m_gc.enable()
+    return {
+        'ops': v_op_cnt,
+        'repeat': iv_repeat,
+        'best_s': min(l_time),
+        'median_s': m_stat.median(l_time),
+        'op_ns': min(l_time) / max(v_op_cnt, 1) * 1e9}
+
+
+def bench_run(iv_shape: Shape, iv_repeat: int = 5, iv_case_re: Optional[str] = None,
+              il_baseline: Optional[dict] = None) -> dict:
+    """
+    :param iv_case_re: run only cases with names matching this regular expression.
+    :param il_baseline: previous result of `bench_run`, adds `ratio` of the best time to the baseline one.
+    :return: JSON-serializable result.
+    """
+    v_ctx = Context(iv_shape)
+    l_base: dict = {v['name']: v for v in il_baseline['results']} if il_baseline else {}
+    l_result: List[dict] = []
+    for v_name, v_fn in _case_l_get(iv_shape).items():
+        if iv_case_re is not None and not m_re.search(iv_case_re, v_name):
+            continue
+        l_res: dict = {'name': v_name, **case_measure(v_ctx, v_fn, iv_repeat)}
+        if v_name in l_base:
+            l_res['baseline_best_s'] = l_base[v_name]['best_s']
+            l_res['ratio'] = l_res['best_s'] / l_base[v_name]['best_s']
+        l_result.append(l_res)
+    return {
+        'python': m_pf.python_implementation() + ' ' + m_pf.python_version(),
+        'shape': iv_shape.as_dict(),
+        'option_count': iv_shape.option_cnt(),
+        'results': l_result}
+
+
+def main():
+    v_arg = m_arg.ArgumentParser(description=__doc__)
+    v_arg.add_argument('--sections', type=int, default=20)
+    v_arg.add_argument('--width', type=int, default=20, help='options on every level of a section')
+    v_arg.add_argument('--depth', type=int, default=3, help='levels of nested sections')
+    v_arg.add_argument('--layers', type=int, default=3, help='count of sources')
+    v_arg.add_argument('--list-width', type=int, default=4, help='options of a list item, 0 for no lists')
+    v_arg.add_argument('--list-size', type=int, default=200, help='items of a list')
+    v_arg.add_argument('--repeat', type=int, default=5)
+    v_arg.add_argument('--case', default=None, help='regular expression selecting cases by name')
+    v_arg.add_argument('--baseline', default=None, help='JSON result of a previous run to compare with')
+    v_arg.add_argument('--out', default=None, help='write the result to this file instead of stdout')
+    v_args = v_arg.parse_args()
+    l_baseline: Optional[dict] = None
+    if v_args.baseline is not None:
+        with open(v_args.baseline) as v_file:
+            l_baseline = m_json.load(v_file)
+    l_ret: dict = bench_run(
+        Shape(v_args.sections, v_args.width, v_args.depth, v_args.list_width, v_args.list_size, v_args.layers),
+        v_args.repeat, v_args.case, l_baseline)
+    v_text: str = m_json.dumps(l_ret, indent=1)
+    if v_args.out is None:
+        print(v_text)
+    else:
+        with open(v_args.out, 'w') as v_file:
+            v_file.write(v_text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
-from .main import Config, SubConfig, NODE_SEP, \
+from .main import Config, SubConfig, SliceView, ConfigState, Schema, NODE_SEP, \
     as_node, NodeAbc, Section, OptionAbc,\
     OptValue, OptVInt, OptVChoice, OptVFloat, OptList, OptLInt, OptLFloat
+from .source import FileSource, FileWatcher, LazySource, FlatSource
+from .profile import Profiler, ProfileEntry
+from .shared import SharedPublisher, SharedConfig
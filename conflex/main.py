@@ -1,41 +1,133 @@
-from typing import Mapping, Sequence, List, Iterable, Sized, Tuple, Any, Union, AbstractSet
+from typing import Mapping, Sequence, List, Iterable, Iterator, Sized, Tuple, Any, Union, AbstractSet, Dict, \
+    Optional, NamedTuple, Callable, get_type_hints, get_origin, get_args
 from abc import ABC, abstractmethod
 
-import copy as m_cp
+import array as m_arr
+import collections.abc as m_abc
+import functools as m_ft
+import hashlib as m_hl
+import itertools as m_it
 import logging as m_log
+import sys as m_sys
+import asyncio as m_aio
+import copy as m_cp
+import dataclasses as m_dc
+
+from . import source as m_src
 
 gv_log = m_log.getLogger(__name__)
 NODE_SEP: str = '/'
+# Max count of compiled option paths cached by each `Schema` (shared with all its configs).
+gv_path_cache_size: int = 4096
+# Min count of source layers to build the winning layer index for, fewer layers are cheaper to probe.
+gv_layer_index_min: int = 4
+# Max count of memoized parse results of raw strings per option value type, applied at import.
+gv_parse_memo_size: int = 4096
+
+
+# Multipliers of the int option suffixes.
+_INT_SUFFIX_2_L: Dict[str, int] = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4, 'PB': 1024 ** 5}
+_INT_SUFFIX_1_L: Dict[str, int] = {'K': 1000, 'M': 1000 ** 2, 'G': 1000 ** 3, 'T': 1000 ** 4, 'P': 1000 ** 5}
 
 
 def _opt_int_parse(iv: str) -> int:
     if type(iv) is not str:
         return int(iv)
-    v_m: int = {
-        'KB': 1024,
-        'MB': 1024 * 1024,
-        'GB': 1024 * 1024 * 1024,
-        'TB': 1024 * 1024 * 1024 * 1024,
-        'PB': 1024 * 1024 * 1024 * 1024 * 1024
-        }.get(iv[-2:], 1)
+    return _opt_int_str_parse(iv)
+
+
+@m_ft.lru_cache(maxsize=gv_parse_memo_size)
+def _opt_int_str_parse(iv: str) -> int:
+    v_m: int = _INT_SUFFIX_2_L.get(iv[-2:], 1)
     if v_m > 1:
         return int(iv[:-2]) * v_m
-    v_m: int = {
-        'K': 1000,
-        'M': 1000 * 1000,
-        'G': 1000 * 1000 * 1000,
-        'T': 1000 * 1000 * 1000 * 1000,
-        'P': 1000 * 1000 * 1000 * 1000 * 1000
-        }.get(iv[-1:], 1)
+    v_m: int = _INT_SUFFIX_1_L.get(iv[-1:], 1)
     if v_m > 1:
         return int(iv[:-1]) * v_m
     return int(iv)
 
 
 def _opt_float_parse(iv: str) -> float:
+    if type(iv) is not str:
+        return float(iv)
+    return _opt_float_str_parse(iv)
+
+
+@m_ft.lru_cache(maxsize=gv_parse_memo_size)
+def _opt_float_str_parse(iv: str) -> float:
     return float(iv)
 
 
+def _str_intern(iv):
+    """
+    :return: interned `iv` if it is a `str`, the same value otherwise.
+    """
+    return m_sys.intern(iv) if type(iv) is str else iv
+
+
+def _opt_list_pack(il_raw: list, iv_parse: Callable, iv_typecode: str, iv_storage: str):
+    """
+    Parse list option values in bulk into the contiguous storage.
+
+    :param iv_parse: parser of a single value used if values are not numbers already (or for every value if it is
+        not the stock parser).
+    :param iv_typecode: `array` type code.
+    :param iv_storage: 'array' or 'numpy'.
+    :return: read-only memoryview of `array.array` or read-only NumPy array.
+    """
+    try:
+        v_arr = None
+        if getattr(iv_parse, '__func__', None) in _VALUE_PARSE_BULK:
+            try:
+                v_arr = m_arr.array(iv_typecode, il_raw)
+            except TypeError:
+                pass
+        if v_arr is None:
+            v_arr = m_arr.array(iv_typecode, map(iv_parse, il_raw))
+    except OverflowError as x:
+        raise ValueError(f'List value does not fit into the `{iv_typecode}` array: {x}') from x
+    if iv_storage == 'array':
+        return memoryview(v_arr).toreadonly()
+    import numpy as m_np
+    v_ret = m_np.frombuffer(v_arr, dtype=m_np.int64 if iv_typecode == 'q' else m_np.float64)
+    v_ret.setflags(write=False)
+    return v_ret
+
+
+# Types of the source values that are not mappings for sure.
+_SCALAR_TYPE_S: frozenset = frozenset((str, int, float, bool, type(None)))
+
+
+def _column_pack(iv_parser: 'OptionAbc', il_raw: list, iv_path_raw: str) -> Union[m_arr.array, list]:
+    """
+    Parse values of the column. `_MISSING` items get the default.
+
+    :return: `array.array` for the numeric options, list with interned strings for others.
+    """
+    v_typecode: Optional[str] = iv_parser._typecode
+    if v_typecode is not None and type(iv_parser).value_parse in _VALUE_PARSE_BULK:
+        try:
+            return m_arr.array(v_typecode, il_raw)
+        except (TypeError, OverflowError):
+            pass
+    v_parse: Callable = iv_parser.value_parse
+    v_default = _MISSING
+    l_ret: list = []
+    for v in il_raw:
+        if v is _MISSING:
+            if v_default is _MISSING:
+                v_default = iv_parser.default_get(iv_path_raw)
+            l_ret.append(v_default)
+        else:
+            l_ret.append(v_parse(v))
+    if v_typecode is not None:
+        try:
+            return m_arr.array(v_typecode, l_ret)
+        except (TypeError, OverflowError):
+            return l_ret
+    return list(map(_str_intern, l_ret))
+
+
 def _opt_name_split(iv: str):
     l_name = iv.split('_', maxsplit=1)
     if len(l_name) == 2:
@@ -51,10 +143,12 @@ class NodeAbc(ABC):
     """
     Abstract base class for all config options and sections.
     """
+    __slots__ = ('kind', 'name', 'child_l', 'required')
+
     def __init__(self, iv_kind: str):
         self.kind: str = iv_kind
         self.name: str = ''
-        self.child_l: Sequence = []
+        self.child_l: Sequence = ()
         self.required = False
 
     def name_set(self, iv: str):
@@ -103,6 +197,8 @@ class Section(NodeAbc):
     """
     Config section.
     """
+    __slots__ = ()
+
     def __init__(self):
         super().__init__('s')
 
@@ -111,6 +207,10 @@ class OptionAbc(NodeAbc):
     """
     Root class for all config options.
     """
+    __slots__ = ('default',)
+    # `array` type code of the parsed values, None if values are not numbers.
+    _typecode: Optional[str] = None
+
     def __init__(self, iv_kind: str):
         super().__init__(iv_kind)
         self.default = None
@@ -128,6 +228,8 @@ class OptValue(OptionAbc):
     """
     Single valued untyped option.
     """
+    __slots__ = ()
+
     def __init__(self, iv_default=None, iv_required: bool = None):
         super().__init__('v')
         if iv_default is not None:
@@ -140,7 +242,7 @@ class OptValue(OptionAbc):
             self.required = True if iv_required is None else iv_required
 
     def value_parse(self, iv):
-        return iv
+        return _str_intern(iv)
 
     def default_get(self, iv_path: str):
         if self.required:
@@ -154,6 +256,9 @@ class OptVInt(OptValue):
     Supports suffixes `K` for 1000 and `KB` for 1024 multiplier and also `M`, `G`, `P`, `T` , `MB`, `GB`, `PB`, `TB`
     suffixes with similar behavior.
     """
+    __slots__ = ()
+    _typecode = 'q'
+
     def value_parse(self, iv: str) -> int:
         return _opt_int_parse(iv)
 
@@ -162,6 +267,8 @@ class OptVChoice(OptValue):
     """
     Single valued option that contain `str` keys which is mapped to some values.
     """
+    __slots__ = ('_mapping_l',)
+
     def __init__(self, il_mapping: dict, iv_default=None, iv_required: bool = None):
         if isinstance(il_mapping, Mapping):
             self._mapping_l = il_mapping
@@ -179,6 +286,9 @@ class OptVFloat(OptValue):
     """
     Single valued option that should contain `float` value.
     """
+    __slots__ = ()
+    _typecode = 'd'
+
     def value_parse(self, iv: str) -> float:
         return _opt_float_parse(iv)
 
@@ -187,8 +297,25 @@ class OptList(OptionAbc):
     """
     List contained option with untyped values.
     """
-    def __init__(self, iv_default=None, iv_required: bool = None):
+    __slots__ = ('storage',)
+
+    def __init__(self, iv_default=None, iv_required: bool = None, iv_storage: str = 'list'):
+        """
+        :param iv_storage: 'list' -- value is a new `list` on every read; 'array' -- values are parsed in bulk once
+            into `array.array` and read-only `memoryview` is returned; 'numpy' -- read-only NumPy array is returned
+            (`numpy` package is required).
+        """
         super().__init__('l')
+        if iv_storage not in ('list', 'array', 'numpy'):
+            raise ValueError(f'Unknown list storage `{iv_storage}`.')
+        if iv_storage != 'list' and self._typecode is None:
+            raise ValueError(f'Storage `{iv_storage}` is supported by typed list options only.')
+        if iv_storage == 'numpy':
+            try:
+                import numpy as _
+            except ImportError as x:
+                raise ImportError(r'Package `numpy` is required for the list storage `numpy`.') from x
+        self.storage: str = iv_storage
         if iv_default is None:
             self.default = []
             self.required = True if iv_required is None else iv_required
@@ -199,8 +326,16 @@ class OptList(OptionAbc):
             self.required = False
 
     def value_parse(self, iv):
-        return iv
-    
+        return _str_intern(iv)
+
+    def values_parse(self, il_raw: list):
+        """
+        Parse all values of the option at once.
+        """
+        if self.storage == 'list':
+            return list(map(self.value_parse, il_raw))
+        return _opt_list_pack(il_raw, self.value_parse, self._typecode, self.storage)
+
     def default_get(self, iv_path: str):
         if self.required:
             raise KeyError(f'The config option at {iv_path} is required.')
@@ -211,6 +346,9 @@ class OptLInt(OptList):
     """
     List contained option with values of type `int`. Multiplication prefixes is supported.
     """
+    __slots__ = ()
+    _typecode = 'q'
+
     def value_parse(self, iv: str) -> int:
         return _opt_int_parse(iv)
 
@@ -219,10 +357,19 @@ class OptLFloat(OptList):
     """
     List contained option with values of type `float`.
     """
+    __slots__ = ()
+    _typecode = 'd'
+
     def value_parse(self, iv: str) -> float:
         return _opt_float_parse(iv)
 
 
+# Stock parsers of the typed options, they keep numbers as they are, so numbers are packed into arrays without them.
+# Subclasses overriding `value_parse` (to validate, for example) get it called for every value.
+_VALUE_PARSE_BULK: frozenset = frozenset((
+    OptVInt.value_parse, OptVFloat.value_parse, OptLInt.value_parse, OptLFloat.value_parse))
+
+
 def as_node(iv_name: str) -> NodeAbc:
     """
     :param iv_name: name of the config node (option or section).
@@ -259,7 +406,6 @@ def _parser_dict_create(il_tree) -> dict:
                 if len(v_v.child_l):
                     child_l: list = v_v.child_l if isinstance(v_v.child_l, list) else list(v_v.child_l)
                     l_l_root.append((f'{v_kp}{v_v.name}', child_l))
-                    v_v.child_l = ()
                 if f'{v_kp}{v_v.name}' in l_plain:
                     raise KeyError(f'The option named `{v_kp}{v_v.name}` is already exists.')
                 l_plain[f'{v_kp}{v_v.name}'] = v_v
@@ -270,55 +416,348 @@ def _parser_dict_create(il_tree) -> dict:
     return l_plain
 
 
+def _parser_child_create(il_parser: Mapping[str, NodeAbc], iv_base: str = '') -> Dict[str, List[str]]:
+    """Map path of every node under `iv_base` to the names of its children.
+
+    :param il_parser: plain dict parser created by `_parser_dict_create`.
+    :param iv_base: normalized path of the sub-tree root, empty string for the whole tree.
+    :return: dict of lists in the order of the option definitions.
+    """
+    v_pref: str = f'{iv_base}{NODE_SEP}' if iv_base else ''
+    l_child: Dict[str, List[str]] = {}
+    for v_path in il_parser:
+        if v_path.startswith(v_pref):
+            v_parent, _, v_name = v_path.rpartition(NODE_SEP)
+            l_child.setdefault(v_parent, []).append(v_name)
+    return l_child
+
+
+class Schema(Mapping[str, NodeAbc]):
+    """
+    Compiled config schema: plain `path -> node` dict created from the tree of node definitions with metadata
+    precomputed for every path. Schema is immutable so any number of `Config` and `SubConfig` objects share it; nodes
+    must not be modified after compiling.
+    """
+    __slots__ = (
+        '_parser_l', '_child_l', '_opt_path_l', '_fingerprint', '_bind_plan_l', '_resolver_l', 'codegen', 'path_step_l')
+
+    def __init__(self, il_tree: Union[NodeAbc, Sequence, Mapping[str, NodeAbc]] = None, iv_codegen: bool = False):
+        """
+        :param il_tree: tree of the node definitions (it is not modified) or plain dict parser.
+        :param iv_codegen: generate specialized resolver function for every option path read (see `resolver`).
+        """
+        if il_tree is None:
+            l_parser: Dict[str, NodeAbc] = {}
+        elif isinstance(il_tree, Mapping):
+            l_parser: Dict[str, NodeAbc] = dict(il_tree)
+        else:
+            l_parser: Dict[str, NodeAbc] = _parser_dict_create(il_tree)
+        self._parser_l: Dict[str, NodeAbc] = l_parser
+        self._child_l: Dict[str, List[str]] = _parser_child_create(l_parser)
+        self._opt_path_l: Dict[str, Dict[str, str]] = {}
+        self._fingerprint: Optional[str] = None
+        self._bind_plan_l: Dict[Tuple[type, str], _BindPlan] = {}
+        self._resolver_l: Dict[Tuple[str, str], Optional[Callable]] = {}
+        self.codegen: bool = iv_codegen
+        # `_path_compile` results for the (base, path) pairs.
+        self.path_step_l: Callable[[str, str], List[_PathStep]] = _path_compile_cache_create(l_parser)
+
+    def __getitem__(self, iv_path: str) -> NodeAbc:
+        return self._parser_l[iv_path]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parser_l)
+
+    def __len__(self) -> int:
+        return len(self._parser_l)
+
+    def __contains__(self, iv_path) -> bool:
+        return iv_path in self._parser_l
+
+    @property
+    def parser_l(self) -> Dict[str, NodeAbc]:
+        return self._parser_l
+
+    @property
+    def child_l(self) -> Dict[str, List[str]]:
+        """
+        :return: names of the children of every section in the order of the definitions, `''` key is the root.
+        """
+        return self._child_l
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = _schema_fingerprint(self._parser_l)
+        return self._fingerprint
+
+    def resolver(self, iv_base: str, il_step: Tuple['_PathStep', ...]) -> Optional[Callable]:
+        """
+        :param iv_base: normalized path of the walkers the resolver is called with.
+        :param il_step: compiled option path relative to `iv_base`.
+        :return: resolver generated by `_resolver_compile`, None if code generation is off or the path is not
+            supported.
+        """
+        if not self.codegen:
+            return None
+        v_key: Tuple[str, str] = (iv_base, il_step[-1].path_raw)
+        try:
+            return self._resolver_l[v_key]
+        except KeyError:
+            v_ret: Optional[Callable] = _resolver_compile(self._parser_l, il_step)
+            self._resolver_l[v_key] = v_ret
+            return v_ret
+
+    def bind_plan(self, iv_cls: type, iv_base: str = '') -> '_BindPlan':
+        """
+        :return: validated mapping of the dataclass fields to the option paths relative to `iv_base`.
+        """
+        v_ret: Optional[_BindPlan] = self._bind_plan_l.get((iv_cls, iv_base))
+        if v_ret is None:
+            v_ret = _bind_plan_create(self._parser_l, self._child_l, iv_cls, iv_base)
+            self._bind_plan_l[(iv_cls, iv_base)] = v_ret
+        return v_ret
+
+    def opt_path_l(self, iv_base: str = '') -> Dict[str, str]:
+        """
+        :param iv_base: normalized path of the sub-tree root.
+        :return: path relative to `iv_base` -> normalized path of every option under `iv_base` in the depth-first
+            order.
+        """
+        l_ret: Optional[Dict[str, str]] = self._opt_path_l.get(iv_base)
+        if l_ret is not None:
+            return l_ret
+        v_pref_len: int = len(iv_base) + 1 if iv_base else 0
+        l_ret = {}
+        l_stack: list = [(iv_base, iter(self._child_l.get(iv_base, ())))]
+        while len(l_stack):
+            v_path, v_name_it = l_stack[-1]
+            v_name = next(v_name_it, None)
+            if v_name is None:
+                l_stack.pop()
+                continue
+            v_path = f'{v_path}{NODE_SEP}{v_name}' if v_path else v_name
+            if self._parser_l[v_path].kind != 's':
+                l_ret[v_path[v_pref_len:]] = v_path
+            if v_path in self._child_l:
+                l_stack.append((v_path, iter(self._child_l[v_path])))
+        self._opt_path_l[iv_base] = l_ret
+        return l_ret
+
+
+class _BindPlan(NamedTuple):
+    """
+    How `Config.bind` populates the dataclass.
+    """
+    cls: type
+    # Relative paths of the values read at once with `Config.get_many`, including values of nested dataclasses.
+    path_l: Tuple[str, ...]
+    # (field name, mode, argument): 'v' -- value index in `path_l`, 't' -- same converted to tuple, 'o' -- own value of
+    # the sub-config, 'n' -- nested `_BindPlan` over the same values, 's' -- (raw relative path, `_BindPlan` of items)
+    # for `Config.slice` items.
+    field_l: Tuple[Tuple[str, str, Any], ...]
+
+
+def _bind_plan_create(
+        il_parser: Mapping[str, NodeAbc], il_child: Mapping[str, List[str]], iv_cls: type, iv_base: str,
+        iv_pref: str = '', il_path: list = None) -> _BindPlan:
+    """
+    :param iv_base: normalized path of the config the dataclass is bound to.
+    :param iv_pref: path of the nested dataclass relative to `iv_base`.
+    :param il_path: value paths of the outer dataclass, nested ones add their paths to it.
+    """
+    if not m_dc.is_dataclass(iv_cls):
+        raise TypeError(f'`{iv_cls.__qualname__}` is not a dataclass.')
+    l_path: list = [] if il_path is None else il_path
+    l_field: list = []
+    l_hint: dict = get_type_hints(iv_cls)
+    v_base: str = (f'{iv_base}{NODE_SEP}{iv_pref}' if iv_base else iv_pref) if iv_pref else iv_base
+    for v_fld in m_dc.fields(iv_cls):
+        if not v_fld.init:
+            continue
+        v_name: str = v_fld.metadata.get('path', v_fld.name)
+        v_hint = l_hint.get(v_fld.name)
+        if v_name == 'v':
+            if v_base == '' or il_parser[v_base].kind == 's':
+                raise KeyError(f'Field `{iv_cls.__qualname__}.v`: node `{v_base}` has no own value.')
+            if iv_pref:
+                l_field.append((v_fld.name, 'v', len(l_path)))
+                l_path.append(iv_pref)
+            else:
+                l_field.append((v_fld.name, 'o', None))
+            continue
+        v_path: str = f'{v_base}{NODE_SEP}{v_name}' if v_base else v_name
+        if v_path not in il_parser:
+            raise KeyError(f'Field `{iv_cls.__qualname__}.{v_fld.name}`: option `{v_path}` is not in the schema.')
+        v_path_rel: str = f'{iv_pref}{NODE_SEP}{v_name}' if iv_pref else v_name
+        v_kind: str = il_parser[v_path].kind
+        l_arg: tuple = get_args(v_hint) if get_origin(v_hint) is tuple else ()
+        if m_dc.is_dataclass(v_hint):
+            if v_path not in il_child:
+                raise TypeError(f'Field `{iv_cls.__qualname__}.{v_fld.name}`: node `{v_path}` has no children.')
+            l_field.append((
+                v_fld.name, 'n', _bind_plan_create(il_parser, il_child, v_hint, iv_base, v_path_rel, l_path)))
+        elif len(l_arg) == 2 and l_arg[1] is Ellipsis and m_dc.is_dataclass(l_arg[0]):
+            l_field.append((
+                v_fld.name, 's', (v_path_rel, _bind_plan_create(il_parser, il_child, l_arg[0], v_path))))
+        elif v_kind == 's':
+            raise TypeError(f'Field `{iv_cls.__qualname__}.{v_fld.name}`: section `{v_path}` needs dataclass type.')
+        else:
+            l_field.append((v_fld.name, 't' if len(l_arg) else 'v', len(l_path)))
+            l_path.append(v_path_rel)
+    return _BindPlan(iv_cls, tuple(l_path) if il_path is None else (), tuple(l_field))
+
+
+def _bind_build(iv_conf: 'Config', iv_plan: _BindPlan, il_value: List[Any]):
+    """
+    :param il_value: values of the top level `_BindPlan.path_l`.
+    """
+    l_kw: dict = {}
+    for v_name, v_mode, v_arg in iv_plan.field_l:
+        if v_mode == 'v':
+            l_kw[v_name] = il_value[v_arg]
+        elif v_mode == 't':
+            l_kw[v_name] = tuple(il_value[v_arg])
+        elif v_mode == 'o':
+            l_kw[v_name] = iv_conf.v
+        elif v_mode == 'n':
+            l_kw[v_name] = _bind_build(iv_conf, v_arg, il_value)
+        else:
+            v_path, v_plan = v_arg
+            l_kw[v_name] = tuple(_bind_build(v, v_plan, v.get_many(v_plan.path_l)) for v in iv_conf.slice(v_path))
+    return iv_plan.cls(**l_kw)
+
+
+def _schema_fingerprint(il_parser: Mapping[str, NodeAbc]) -> str:
+    """
+    :return: hash of the schema. Configs with the same fingerprint resolve the same sources into the same values.
+    """
+    l_attr: list = []
+    for v_path, v_node in il_parser.items():
+        v_cls: type = type(v_node)
+        # Option subclasses without `__slots__` keep their parameters in the instance dict.
+        l_dict: Optional[dict] = getattr(v_node, '__dict__', None)
+        l_attr.append((
+            v_path, v_cls.__module__, v_cls.__qualname__,
+            [_fingerprint_value(getattr(v_node, v, None)) for v in _slot_l_get(v_cls)],
+            None if l_dict is None else sorted((k, _fingerprint_value(v)) for k, v in l_dict.items())))
+    return m_hl.blake2b(repr(l_attr).encode(), digest_size=16).hexdigest()
+
+
+def _fingerprint_value(iv: Any) -> Any:
+    """
+    :return: `iv` with the values whose repr differs from run to run (functions, objects with the default repr holding
+        the address) replaced by their qualified names, so the fingerprint of the same schema is stable.
+    """
+    v_type: type = type(iv)
+    if v_type is list or v_type is tuple:
+        return v_type(_fingerprint_value(v) for v in iv)
+    if v_type is dict:
+        return {k: _fingerprint_value(v) for k, v in iv.items()}
+    if v_type is m_ft.partial:
+        return 'functools.partial', _fingerprint_value(iv.func), _fingerprint_value(iv.args), \
+            _fingerprint_value(iv.keywords)
+    if callable(iv) and hasattr(iv, '__qualname__'):
+        return f'{getattr(iv, "__module__", None)}.{iv.__qualname__}'
+    if v_type.__repr__ is object.__repr__:
+        return f'{v_type.__module__}.{v_type.__qualname__}', _fingerprint_value(getattr(iv, '__dict__', None))
+    return iv
+
+
+@m_ft.lru_cache(maxsize=None)
+def _slot_l_get(iv_cls: type) -> Tuple[str, ...]:
+    """
+    :return: attributes of the schema node class that define how it parses values.
+    """
+    return tuple(v for v_cls in iv_cls.__mro__ for v in getattr(v_cls, '__slots__', ()) if v != 'child_l')
+
+
 class ConfTreeWalker:
+    """
+    Immutable cursor over one config source. `step` and `move` return a new cursor, so cursors can be shared freely.
+    """
+    __slots__ = ('node_l', 'kind', 'key', 'path', 'path_raw', 'is_slice_list')
+
     class Missing:
         ...
 
-    def __init__(self, il_tree_slice: list):
-        self.node_l: list = il_tree_slice
-        self.kind: str = ''
-        self.key: str = ''
-        self.path: str = ''
-        self.path_raw: str = ''
-        self.is_slice_list = False
-
-    def move(self, il_parser: Mapping[str, OptionAbc], iv_key_raw: str):
-        self._curr_set(il_parser, iv_key_raw)
-        self.is_slice_list = True if self.is_slice_list else self.kind == 'l'
+    def __init__(
+            self, il_tree_slice: Sequence, iv_step: '_PathStep' = None, iv_is_slice_list: bool = False):
+        self.node_l: Sequence = il_tree_slice
+        if iv_step is None:
+            self.kind: str = ''
+            self.key: str = ''
+            self.path: str = ''
+            self.path_raw: str = ''
+        else:
+            self.kind, self.key, self.path, self.path_raw = iv_step[:4]
+        self.is_slice_list: bool = iv_is_slice_list
+
+    def move(self, il_parser: Mapping[str, OptionAbc], iv_key_raw: str) -> 'ConfTreeWalker':
+        return self.step(_PathStep.create(*_key_parse(il_parser, self.path, iv_key_raw)))
+
+    def step(self, iv_step: '_PathStep') -> 'ConfTreeWalker':
+        """
+        Move cursor one level down using the step precompiled by `_path_compile`.
+
+        :return: new cursor. The cursor over a single node the source has no such node for is shared; cursor over
+            several nodes keeps a missing marker for every node, so list items without the option get the default.
+        """
+        v_is_slice_list: bool = self.is_slice_list or iv_step.kind == 'l'
+        if self.node_l is _MISSING_L:
+            return iv_step.missing_l[v_is_slice_list]
+        v_key: str = iv_step.key
+        v_key_kind: str = iv_step.key_kind
+        v_list_expand: bool = iv_step.kind in ('s', 'l')
+        v_found: bool = False
         l_node_new: list = []
         for v_opt in self.node_l:
-            if not isinstance(v_opt, Mapping):
-                l_node_new.append(self.Missing())
+            if type(v_opt) is not dict and not isinstance(v_opt, m_abc.Mapping):
+                l_node_new.append(_MISSING)
                 continue
-            if self.key in v_opt:
-                v_opt = v_opt[self.key]
-            elif f'{self.kind}_{self.key}' in v_opt:
-                v_opt = v_opt[f'{self.kind}_{self.key}']
+            if v_key in v_opt:
+                v_opt = v_opt[v_key]
+            elif v_key_kind in v_opt:
+                v_opt = v_opt[v_key_kind]
             else:
-                l_node_new.append(self.Missing())
+                l_node_new.append(_MISSING)
                 continue
-            if self.kind in ('s', 'l') and isinstance(v_opt, list):
+            v_found = True
+            if v_list_expand and isinstance(v_opt, list):
                 l_node_new.extend(v_opt)
             else:
                 l_node_new.append(v_opt)
-        self.node_l = l_node_new
+        if not v_found and len(self.node_l) == 1:
+            return iv_step.missing_l[v_is_slice_list]
+        return ConfTreeWalker(l_node_new, iv_step, v_is_slice_list)
 
     def node_exist(self) -> bool:
-        return any([type(v) is not self.Missing for v in self.node_l])
+        return any([v is not _MISSING for v in self.node_l])
 
     def slice_exist(self, iv_idx) -> bool:
         v_nd = self.node_l[iv_idx] if len(self.node_l) > iv_idx else None
-        return v_nd is not None and type(v_nd) is not self.Missing
+        return v_nd is not None and v_nd is not _MISSING
 
     def value_get(self, il_parser: Mapping[str, OptionAbc]) -> Union[list, Any]:
         if self.kind == 's':
             raise TypeError('Sections can not have a value.')
         v_parser: OptionAbc = il_parser[self.path]
+        if self.kind == 'l' and self.is_slice_list and v_parser.storage != 'list':
+            # Raw and default values are parsed together in bulk, parsers of typed lists accept parsed values.
+            l_raw: list = []
+            for v_opt in self.node_l:
+                if isinstance(v_opt, m_abc.Mapping):
+                    v_opt = v_opt.get('v')
+                if v_opt is _MISSING:
+                    l_raw.extend(v_parser.default_get(self.path_raw))
+                else:
+                    l_raw.append(v_opt)
+            return v_parser.values_parse(l_raw)
         l_ret: list = []
         for v_opt in self.node_l:
-            if isinstance(v_opt, Mapping):
+            if isinstance(v_opt, m_abc.Mapping):
                 v_opt = v_opt.get('v')
-            if type(v_opt) is self.Missing:
+            if v_opt is _MISSING:
                 if self.kind == 'l':
                     l_ret.extend(v_parser.default_get(self.path_raw))
                 if self.kind == 'v':
@@ -330,23 +769,259 @@ class ConfTreeWalker:
         else:
             return l_ret[0] if len(l_ret) else None
 
-    def _curr_set(self, il_parser: Mapping[str, OptionAbc], iv_raw: str):
-        l_key_part = iv_raw.split('_', maxsplit=1)
-        v_key_part_len = len(l_key_part)
-        v_path_pref: str = f'{self.path}{NODE_SEP}' if self.path else ''
-        if v_key_part_len == 2:
-            if l_key_part[0] not in ['s', 'v', 'l']:
-                self.kind = str(il_parser[f'{v_path_pref}{iv_raw}'].kind)
-                self.key = iv_raw
-            elif il_parser[f'{v_path_pref}{l_key_part[1]}'].kind != l_key_part[0]:
-                raise KeyError(f'Option `{v_path_pref}{l_key_part[1]}` exist but have different kind.')
-            else:
-                self.kind, self.key = l_key_part
-        elif v_key_part_len == 1:
-            self.kind = str(il_parser[f'{v_path_pref}{iv_raw}'].kind)
-            self.key = iv_raw
-        self.path_raw = f'{v_path_pref}{iv_raw}'
-        self.path = f'{v_path_pref}{self.key}'
+
+_MISSING = ConfTreeWalker.Missing()
+# Nodes of the cursor for the source that have no node at the cursor path.
+_MISSING_L: tuple = (_MISSING,)
+
+
+class _LazyWalker(ConfTreeWalker):
+    """
+    Cursor positioned in a lazy layer without loading it. The layer is loaded and walked the first time the nodes of
+    the cursor are needed, so a knot does not load the layers its reads do not reach.
+    """
+    __slots__ = ('_origin', '_step_l', '_node_l')
+
+    def __init__(self, iv_origin: ConfTreeWalker, il_step: Tuple['_PathStep', ...]):
+        self.kind, self.key, self.path, self.path_raw = il_step[-1][:4]
+        self.is_slice_list = iv_origin.is_slice_list or any(v.kind == 'l' for v in il_step)
+        self._origin: ConfTreeWalker = iv_origin
+        self._step_l: Tuple[_PathStep, ...] = il_step
+        self._node_l: Optional[Sequence] = None
+
+    @property
+    def node_l(self) -> Sequence:
+        if self._node_l is None:
+            v_wl: ConfTreeWalker = self._origin
+            for v_step in self._step_l:
+                v_wl = v_wl.step(v_step)
+            self._node_l = v_wl.node_l
+        return self._node_l
+
+
+def _key_parse(il_parser: Mapping[str, OptionAbc], iv_base: str, iv_raw: str) -> Tuple[str, str, str, str]:
+    """Parse one segment of the option path.
+
+    :param iv_base: normalized path of the parent node.
+    :param iv_raw: segment of the option path, kind prefix is allowed.
+    :return: kind, key, path and raw path of the node.
+    """
+    l_key_part = iv_raw.split('_', maxsplit=1)
+    v_key_part_len = len(l_key_part)
+    v_path_pref: str = f'{iv_base}{NODE_SEP}' if iv_base else ''
+    v_kind: str = ''
+    v_key: str = ''
+    if v_key_part_len == 2:
+        if l_key_part[0] not in ['s', 'v', 'l']:
+            v_kind = str(il_parser[f'{v_path_pref}{iv_raw}'].kind)
+            v_key = iv_raw
+        elif il_parser[f'{v_path_pref}{l_key_part[1]}'].kind != l_key_part[0]:
+            raise KeyError(f'Option `{v_path_pref}{l_key_part[1]}` exist but have different kind.')
+        else:
+            v_kind, v_key = l_key_part
+    elif v_key_part_len == 1:
+        v_kind = str(il_parser[f'{v_path_pref}{iv_raw}'].kind)
+        v_key = iv_raw
+    return v_kind, v_key, f'{v_path_pref}{v_key}', f'{v_path_pref}{iv_raw}'
+
+
+class _PathStep(NamedTuple):
+    """
+    One pre-resolved segment of the option path.
+    """
+    kind: str
+    key: str
+    path: str
+    path_raw: str
+    key_kind: str  # `key` with kind prefix.
+    # Shared cursors for the sources without this node, indexed by `ConfTreeWalker.is_slice_list`.
+    missing_l: Tuple[ConfTreeWalker, ConfTreeWalker]
+
+    @classmethod
+    def create(cls, iv_kind: str, iv_key: str, iv_path: str, iv_path_raw: str) -> '_PathStep':
+        v_ret = cls(iv_kind, iv_key, iv_path, iv_path_raw, f'{iv_kind}_{iv_key}', ())
+        return v_ret._replace(
+            missing_l=(ConfTreeWalker(_MISSING_L, v_ret, iv_kind == 'l'), ConfTreeWalker(_MISSING_L, v_ret, True)))
+
+
+def _path_compile(il_parser: Mapping[str, OptionAbc], iv_base: str, iv_path: str) -> Tuple[_PathStep, ...]:
+    """Parse the option path once into the steps for `ConfTreeWalker.step`.
+
+    :param il_parser: plain dict parser created by `_parser_dict_create`.
+    :param iv_base: normalized path of the node `iv_path` is relative to.
+    :param iv_path: option path, kind prefixes are allowed.
+    :return: tuple of steps, the last one describes the target node.
+    """
+    assert isinstance(iv_path, str), r'Option path is not a str.'
+    if len(iv_path) == 0:
+        raise KeyError(r'Option path is empty.')
+    l_step: list = []
+    for v_key_raw in iv_path.split(NODE_SEP):
+        if len(v_key_raw) == 0:
+            raise KeyError(r'Option path have invalid format.'
+                           f'Format is: `option-or-section , {{ "{NODE_SEP}" , option-or-section }}`,'
+                           f' repeatable "{NODE_SEP}" is prohibited.')
+        l_step.append(_PathStep.create(*_key_parse(il_parser, iv_base, v_key_raw)))
+        iv_base = l_step[-1].path
+    return tuple(l_step)
+
+
+def _path_compile_cache_create(il_parser: Mapping[str, OptionAbc]):
+    """
+    :return: `_path_compile` bound to the parser and wrapped into the LRU cache of `gv_path_cache_size` entries.
+    """
+    return m_ft.lru_cache(maxsize=gv_path_cache_size)(m_ft.partial(_path_compile, il_parser))
+
+
+_NOT_FOUND = object()
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistic of the config value cache returned by `Config.cache_info`.
+    """
+    hits: int
+    misses: int
+    currsize: int
+
+
+class _ResolveError:
+    """
+    Exception raised while resolving an option for the frozen snapshot. It is re-raised on every access.
+    """
+    __slots__ = ('error',)
+
+    def __init__(self, iv_error: Exception):
+        self.error = iv_error
+
+    def __eq__(self, iv):
+        return type(iv) is _ResolveError and type(iv.error) is type(self.error) and iv.error.args == self.error.args
+
+    def raise_(self):
+        raise type(self.error)(*self.error.args)
+
+
+def _value_resolve(il_walker: List[ConfTreeWalker], il_parser: Mapping[str, OptionAbc]):
+    """
+    :return: option value or `_ResolveError` if it can not be resolved.
+    """
+    try:
+        return _walker_knot_merge(il_walker).value_get(il_parser)
+    except (KeyError, ValueError, TypeError) as x:
+        return _ResolveError(x)
+
+
+def _value_same(iv_a, iv_b) -> bool:
+    if iv_a is iv_b:
+        return True
+    if type(iv_a) is not type(iv_b):
+        return False
+    if type(iv_a).__module__ == 'numpy':
+        # NumPy arrays are compared elementwise.
+        return iv_a.shape == iv_b.shape and bool((iv_a == iv_b).all())
+    return iv_a == iv_b
+
+
+_FALLBACK = object()
+
+
+def _resolver_compile(il_parser: Mapping[str, OptionAbc], il_step: Tuple[_PathStep, ...]) -> Optional[Callable]:
+    """
+    Generate Python function resolving the option with key variants, layer order, default and parser of the path
+    inlined. Generated function is called with walkers of every source layer and the optional set the path is added
+    to if no layer has the option. It returns `_FALLBACK` for the sources it does not specialize (non-dict mappings,
+    sections expanded from lists, several nodes per layer, empty lists) so the caller uses the generic walk then.
+
+    :param il_step: compiled option path.
+    :return: None for sections and paths through list options.
+    """
+    if il_step[-1].kind == 's' or any(v.kind == 'l' for v in il_step[:-1]):
+        return None
+    v_parser: OptionAbc = il_parser[il_step[-1].path]
+    l_line: List[str] = [
+        'def resolve(il_walker, il_absent=None):',
+        '    for v_wl in reversed(il_walker):',
+        '        v0 = v_wl.node_l',
+        '        if v0 is _MISSING_L:',
+        '            continue',
+        '        if v_wl.is_slice_list or len(v0) != 1:',
+        '            return _FALLBACK',
+        '        v0 = v0[0]']
+    for v_idx, v_step in enumerate(il_step):
+        v_nd, v_nd_next = f'v{v_idx}', f'v{v_idx + 1}'
+        l_line.extend([
+            f'        if type({v_nd}) is not dict:',
+            f'            if isinstance({v_nd}, Mapping):',
+            f'                return _FALLBACK',
+            f'            continue',
+            f'        if {v_step.key!r} in {v_nd}:',
+            f'            {v_nd_next} = {v_nd}[{v_step.key!r}]',
+            f'        elif {v_step.key_kind!r} in {v_nd}:',
+            f'            {v_nd_next} = {v_nd}[{v_step.key_kind!r}]',
+            f'        else:',
+            f'            continue'])
+        if v_step.kind == 's':
+            l_line.extend([
+                f'        if isinstance({v_nd_next}, list):',
+                f'            return _FALLBACK'])
+    v_nd = f'v{len(il_step)}'
+    if il_step[-1].kind == 'v':
+        l_line.extend([
+            f'        if type({v_nd}) is dict:',
+            f'            return _parse({v_nd}.get("v"))',
+            f'        if isinstance({v_nd}, Mapping):',
+            f'            return _FALLBACK',
+            f'        return _parse({v_nd})',
+            f'    if il_absent is not None:',
+            f'        il_absent.add({il_step[-1].path!r})',
+            f'    return _default({il_step[-1].path_raw!r})'])
+    else:
+        # Values of the list are parsed one by one for the list storage and in bulk for others.
+        v_list: bool = v_parser.storage == 'list'
+        l_line.extend([
+            f'        if not isinstance({v_nd}, list):',
+            f'            {v_nd} = [{v_nd}]',
+            f'        elif not len({v_nd}):',
+            f'            return _FALLBACK',
+            f'        l_ret = []',
+            f'        for v in {v_nd}:',
+            f'            if type(v) is dict:',
+            f'                v = v.get("v")',
+            f'            elif isinstance(v, Mapping):',
+            f'                return _FALLBACK',
+            f'            l_ret.append({"_parse(v)" if v_list else "v"})',
+            f'        return {"l_ret" if v_list else "_values(l_ret)"}',
+            f'    if il_absent is not None:',
+            f'        il_absent.add({il_step[-1].path!r})',
+            f'    return {"list" if v_list else "_values"}(_default({il_step[-1].path_raw!r}))'])
+    l_global: dict = {
+        'Mapping': m_abc.Mapping, '_FALLBACK': _FALLBACK, '_MISSING_L': _MISSING_L, '_parse': v_parser.value_parse,
+        '_default': v_parser.default_get, '_values': getattr(v_parser, 'values_parse', None)}
+    exec(compile('\n'.join(l_line), f'<conflex resolver {il_step[-1].path_raw}>', 'exec'), l_global)
+    return l_global['resolve']
+
+
+def _walker_lazy_step(il_walker: List[ConfTreeWalker], il_step: Tuple['_PathStep', ...]) -> List[ConfTreeWalker]:
+    """
+    Same as `Config._node_step`, but walkers at the root of a lazy layer (or not walked lazy ones) are positioned
+    without loading the layer.
+    """
+    if not il_step:
+        return il_walker
+    v_lazy_cls: type = m_src.LazySource
+    l_ret: List[ConfTreeWalker] = []
+    for v_wl in il_walker:
+        if type(v_wl) is _LazyWalker:
+            if v_wl._node_l is None:
+                l_ret.append(_LazyWalker(v_wl._origin, v_wl._step_l + il_step))
+                continue
+        elif len(v_wl.node_l) == 1 and type(v_wl.node_l[0]) is v_lazy_cls:
+            l_ret.append(_LazyWalker(v_wl, il_step))
+            continue
+        for v_step in il_step:
+            v_wl = v_wl.step(v_step)
+        l_ret.append(v_wl)
+    return l_ret
 
 
 def _walker_knot_merge(il_walker: List[ConfTreeWalker]) -> ConfTreeWalker:
@@ -357,18 +1032,166 @@ def _walker_knot_merge(il_walker: List[ConfTreeWalker]) -> ConfTreeWalker:
     return v_wl
 
 
+def _walker_tree_walk(
+        il_walker: List[ConfTreeWalker], il_parser: Mapping[str, OptionAbc], il_child: Mapping[str, List[str]]
+        ) -> Iterator[List[ConfTreeWalker]]:
+    """Depth-first walk of the schema sub-tree below `il_walker` position moving walkers once per schema node.
+
+    :return: iterator of walker lists positioned at every descendant node. Lists are shared with the walk and must
+        not be modified.
+    """
+    l_stack: list = [(il_walker, iter(il_child.get(il_walker[0].path, ())))]
+    while len(l_stack):
+        l_wl, v_name_it = l_stack[-1]
+        v_name = next(v_name_it, None)
+        if v_name is None:
+            l_stack.pop()
+            continue
+        v_wl: ConfTreeWalker = l_wl[0]
+        v_path: str = f'{v_wl.path}{NODE_SEP}{v_name}' if v_wl.path else v_name
+        v_step = _PathStep.create(il_parser[v_path].kind, v_name, v_path, v_path)
+        l_wl = [v.step(v_step) for v in l_wl]
+        yield l_wl
+        l_name: Optional[List[str]] = il_child.get(l_wl[0].path)
+        if l_name:
+            l_stack.append((l_wl, iter(l_name)))
+
+
+def _layer_index_create(
+        il_walker: List[ConfTreeWalker], il_parser: Mapping[str, OptionAbc], il_child: Mapping[str, List[str]]
+        ) -> Optional[Dict[str, Tuple[int, ...]]]:
+    """Find the layers defining every schema node. Every layer is walked separately and only along its own nodes.
+
+    :param il_walker: walkers of the layers positioned at the config base.
+    :return: normalized path -> ascending indexes of the layers having the node, nodes without layers are omitted.
+        The base node is included unless it is the root. `None` if `_layer_index_fit` fails.
+    """
+    if not _layer_index_fit(il_walker):
+        return None
+    l_ret: Dict[str, list] = {}
+    if il_walker[0].path:
+        l_ret[il_walker[0].path] = [v_idx for v_idx, v_wl in enumerate(il_walker) if v_wl.node_exist()]
+    # Parent path -> steps to the children, shared by all layers.
+    l_step: Dict[str, List[_PathStep]] = {}
+    for v_idx, v_wl in enumerate(il_walker):
+        l_stack: List[ConfTreeWalker] = [v_wl]
+        while len(l_stack):
+            v_wl = l_stack.pop()
+            l_step_child: Optional[List[_PathStep]] = l_step.get(v_wl.path)
+            if l_step_child is None:
+                l_step_child = l_step[v_wl.path] = [
+                    _PathStep.create(il_parser[v_path].kind, v_name, v_path, v_path)
+                    for v_name in il_child.get(v_wl.path, ())
+                    for v_path in (f'{v_wl.path}{NODE_SEP}{v_name}' if v_wl.path else v_name,)]
+            for v_step in l_step_child:
+                v_wl_next: ConfTreeWalker = v_wl.step(v_step)
+                if v_wl_next.node_exist():
+                    l_ret.setdefault(v_step.path, []).append(v_idx)
+                    if v_step.path in il_child:
+                        l_stack.append(v_wl_next)
+    return {v_path: tuple(l_idx) for v_path, l_idx in l_ret.items() if l_idx}
+
+
+def _layer_index_fit(il_walker: List[ConfTreeWalker]) -> bool:
+    """
+    :return: False if there are too few layers for the index to pay off or some of them are lazy (the index walk
+        would load them).
+    """
+    if len(il_walker) < gv_layer_index_min:
+        return False
+    return not any(
+        type(v_wl) is _LazyWalker or any(type(v_nd) is m_src.LazySource for v_nd in v_wl.node_l)
+        for v_wl in il_walker)
+
+
+def _walker_same(il_old: List[ConfTreeWalker], il_new: List[ConfTreeWalker]) -> bool:
+    """
+    :return: True if both walker lists point to the same (or equal) source nodes.
+    """
+    if len(il_old) != len(il_new):
+        return False
+    for v_old, v_new in zip(il_old, il_new):
+        if v_old.node_l is v_new.node_l:
+            continue
+        if len(v_old.node_l) != len(v_new.node_l):
+            return False
+        for v_nd_old, v_nd_new in zip(v_old.node_l, v_new.node_l):
+            if v_nd_old is not v_nd_new and v_nd_old != v_nd_new:
+                return False
+    return True
+
+
+def _walker_tree_diff(
+        il_old: List[ConfTreeWalker], il_new: List[ConfTreeWalker], il_parser: Mapping[str, OptionAbc],
+        il_child: Mapping[str, List[str]], iv_base: str
+        ) -> Iterator[Tuple[str, List[ConfTreeWalker], List[ConfTreeWalker]]]:
+    """Depth-first walk of two source versions that skips sub-trees with the same source nodes.
+
+    :param iv_base: normalized path the walkers are positioned at.
+    :return: iterator of node path with old and new walker lists positioned at every node which source nodes are
+        changed.
+    """
+    l_stack: list = [(iv_base, il_old, il_new, iter(il_child.get(iv_base, ())))]
+    while len(l_stack):
+        v_path, l_wl_old, l_wl_new, v_name_it = l_stack[-1]
+        v_name = next(v_name_it, None)
+        if v_name is None:
+            l_stack.pop()
+            continue
+        v_path = f'{v_path}{NODE_SEP}{v_name}' if v_path else v_name
+        v_step = _PathStep.create(il_parser[v_path].kind, v_name, v_path, v_path)
+        l_wl_old = [v.step(v_step) for v in l_wl_old]
+        l_wl_new = [v.step(v_step) for v in l_wl_new]
+        if _walker_same(l_wl_old, l_wl_new):
+            continue
+        yield v_path, l_wl_old, l_wl_new
+        l_name: Optional[List[str]] = il_child.get(v_path)
+        if l_name:
+            l_stack.append((v_path, l_wl_old, l_wl_new, iter(l_name)))
+
+
 def _walker_slice_merge(il_walker: List[ConfTreeWalker], iv_node_idx: int) -> ConfTreeWalker:
     v_nd = None
     for v in il_walker:
         if v.slice_exist(iv_node_idx):
             v_nd = v.node_l[iv_node_idx]
+    return ConfTreeWalker([v_nd], _walker_slice_step(il_walker))
+
+
+def _walker_slice_step(il_walker: List[ConfTreeWalker]) -> _PathStep:
+    """
+    :return: step of the walker over a single item of the list the walkers are positioned at.
+    """
     v_wl: ConfTreeWalker = il_walker[-1]
-    v_r = ConfTreeWalker([v_nd])
-    v_r.key = v_wl.key
-    v_r.kind = v_wl.kind if v_wl.kind == 's' else 'v'
-    v_r.path = v_wl.path
-    v_r.path_raw = v_wl.path_raw
-    return v_r
+    return _PathStep.create(v_wl.kind if v_wl.kind == 's' else 'v', v_wl.key, v_wl.path, v_wl.path_raw)
+
+
+class ConfigState:
+    """
+    Immutable versioned sources of the config with values resolved from them. `Config` never changes the published
+    state: loading and reloading build a new state and swap the reference, so a reader that took the state sees
+    consistent data. Only the lazily filled value cache and knot memo are updated in place.
+    """
+    __slots__ = ('walker_l', 'cache_l', 'frozen_l', 'frozen_absent_l', 'knot_l', 'version', 'parent', 'layer_l')
+
+    def __init__(
+            self, il_walker: List[ConfTreeWalker], il_cache: Dict[str, Any] = None, il_frozen: Dict[str, Any] = None,
+            il_frozen_absent: AbstractSet[str] = frozenset(), iv_version: int = 0, iv_parent: 'ConfigState' = None,
+            il_layer: Mapping[str, Tuple[int, ...]] = None):
+        """
+        :param iv_version: incremented every time the sources are replaced.
+        :param iv_parent: state of the config the `SubConfig` state is derived from.
+        :param il_layer: index of the layers defining every node (see `_layer_index_create`), walkers are probed one
+            by one if omitted.
+        """
+        self.walker_l: List[ConfTreeWalker] = il_walker
+        self.cache_l: Dict[str, Any] = {} if il_cache is None else il_cache
+        self.frozen_l: Optional[Dict[str, Any]] = il_frozen
+        self.frozen_absent_l: AbstractSet[str] = il_frozen_absent
+        self.knot_l: Dict[str, ConfigState] = {}
+        self.version: int = iv_version
+        self.parent: Optional[ConfigState] = iv_parent
+        self.layer_l: Optional[Mapping[str, Tuple[int, ...]]] = il_layer
 
 
 class Config(Mapping[str, Any]):
@@ -377,12 +1200,35 @@ class Config(Mapping[str, Any]):
     Represent dictionary of configuration options with keys containing full path to corresponding option separated with
     `conflex.NODE_SEP` string.
     """
-    def __init__(self, il_parser: Union[NodeAbc, Sequence] = None):
-        self._walker_l = [ConfTreeWalker([])]
-        self._parser_l: Mapping[str, OptionAbc] = _parser_dict_create(il_parser) if il_parser is not None else {}
+    __slots__ = (
+        '_state', '_schema', '_parser_l', '_path_step_l', '_path_base', '_path_pref', '_cache_hit_cnt',
+        '_cache_miss_cnt', '_subscriber_l', '_file_source_l', '_profiler', '__weakref__')
+
+    def __init__(self, il_parser: Union[Schema, NodeAbc, Sequence] = None):
+        """
+        :param il_parser: compiled schema, or the tree of node definitions to compile.
+        """
+        self._state: ConfigState = ConfigState([ConfTreeWalker([])])
+        self._schema: Schema = il_parser if type(il_parser) is Schema else Schema(il_parser)
+        self._parser_l: Mapping[str, OptionAbc] = self._schema.parser_l
+        self._path_step_l: Callable[[str, str], List[_PathStep]] = self._schema.path_step_l
+        self._path_base: str = ''
+        self._path_pref: str = ''
+        self._cache_hit_cnt: int = 0
+        self._cache_miss_cnt: int = 0
+        self._subscriber_l: Dict[str, list] = {}
+        self._file_source_l: list = []
+        self._profiler = None
 
     def __getitem__(self, item: str):
-        return _walker_knot_merge(self._node_get(self._walker_l_copy(), item)).value_get(self._parser_l)
+        v_st: ConfigState = self._state
+        if v_st.frozen_l is not None:
+            return self._frozen_get(v_st, item)
+        v_ret = v_st.cache_l.get(f'{self._path_pref}{item}', _NOT_FOUND)
+        if v_ret is _NOT_FOUND:
+            return self._cache_fill(v_st, item)
+        self._cache_hit_cnt += 1
+        return list(v_ret) if type(v_ret) is list else v_ret
 
     def __iter__(self):
         return self._parser_l.keys().__iter__()
@@ -390,85 +1236,833 @@ class Config(Mapping[str, Any]):
     def __len__(self):
         return len(self._parser_l)
 
+    def _state_actual(self) -> ConfigState:
+        return self._state
+
     def items(self):
-        return ConfigItemsView(self._walker_l, self._parser_l)
+        return ConfigItemsView(self)
 
-    def _walker_l_copy(self) -> List[ConfTreeWalker]:
-        return [m_cp.copy(v) for v in self._walker_l]
+    def keys(self):
+        """
+        :return: paths of all options (sections are skipped) in the same order as `items` and `values`.
+        """
+        return ConfigKeysView(self)
 
-    def _node_get(self, il_walker: List[ConfTreeWalker], iv_path: str) -> List[ConfTreeWalker]:
-        assert isinstance(iv_path, str), r'Option path is not a str.'
-        if len(iv_path) == 0:
-            raise KeyError(r'Option path is empty.')
-        l_wl = il_walker
-        for v_key_raw in iv_path.split(NODE_SEP):
-            if len(v_key_raw) == 0:
-                raise KeyError(r'Option path have invalid format.'
-                               f'Format is: `option-or-section , {{ "{NODE_SEP}" , option-or-section }}`,'
-                               f' repeatable "{NODE_SEP}" is prohibited.')
-            for v in l_wl:
-                v.move(self._parser_l, v_key_raw)
-        return l_wl
+    def values(self):
+        return ConfigValuesView(self)
+
+    @property
+    def state(self) -> ConfigState:
+        return self._state_actual()
 
-    def slice(self, iv_path: str):
-        l_wl: List[ConfTreeWalker] = self._node_get(self._walker_l_copy(), iv_path)
-        v_len = max((len(v.node_l) for v in l_wl))
-        for v_idx in range(v_len):
-            yield SubConfig([_walker_slice_merge(l_wl, v_idx)], self._parser_l)
+    @property
+    def version(self) -> int:
+        return self._state_actual().version
 
-    def knot(self, iv_path: str):
-        return SubConfig(self._node_get(self._walker_l_copy(), iv_path), self._parser_l)
+    @property
+    def _walker_l(self) -> List[ConfTreeWalker]:
+        return self._state_actual().walker_l
 
-    def load_dicts(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]]) -> None:
+    @property
+    def frozen(self) -> bool:
+        return self._state_actual().frozen_l is not None
+
+    def pin(self) -> 'Config':
+        """
+        :return: copy of this config bound to its current state. Following loads of this config (or of the config the
+            `SubConfig` is taken from) do not affect it.
+        """
+        v_ret: Config = m_cp.copy(self)
+        v_ret._state = self._state_actual()
+        v_ret._subscriber_l = {}
+        v_ret._file_source_l = []
+        return v_ret
+
+    def freeze(self) -> None:
+        """
+        Resolve and parse every option of the schema once and keep the results in a flat `path -> value` table.
+        Until the next `load_dicts` call all reads are served from that table. Values are shared between reads so they
+        must not be modified.
+        """
+        v_st: ConfigState = self._state_actual()
+        l_frozen: Dict[str, Any] = {}
+        l_absent: set = set()
+        if (self._schema.codegen or v_st.layer_l is not None) and (
+                not self._path_base or self._parser_l[self._path_base].kind == 's'):
+            for v_path_rel, v_path in self._schema.opt_path_l(self._path_base).items():
+                try:
+                    l_frozen[v_path] = self._value_get(
+                        v_st.walker_l, self._path_step_l(self._path_base, v_path_rel), l_absent, v_st.layer_l)
+                except (KeyError, ValueError, TypeError) as x:
+                    l_frozen[v_path] = _ResolveError(x)
+            self._state = ConfigState(
+                v_st.walker_l, v_st.cache_l, l_frozen, l_absent, v_st.version, v_st.parent, v_st.layer_l)
+            return
+        l_wl_it: Iterable[List[ConfTreeWalker]] = _walker_tree_walk(
+            v_st.walker_l, self._parser_l, self._schema.child_l)
+        if self._path_base and self._parser_l[self._path_base].kind != 's':
+            l_wl_it = m_it.chain([v_st.walker_l], l_wl_it)
+        for l_wl in l_wl_it:
+            v_path: str = l_wl[0].path
+            if l_wl[0].kind == 's':
+                continue
+            if not any(v.node_exist() for v in l_wl):
+                l_absent.add(v_path)
+            l_frozen[v_path] = _value_resolve(l_wl, self._parser_l)
+        self._state = ConfigState(
+            v_st.walker_l, v_st.cache_l, l_frozen, l_absent, v_st.version, v_st.parent, v_st.layer_l)
+
+    def profile_start(self):
+        """
+        Start recording reads of this config and of the sub-configs taken from it: read counts, resolve and parse
+        time, default fallbacks and the winning source layer of every option. Config that is not profiled does not
+        pay for it, reads of the profiled one use the generic walk instead of generated resolvers.
+
+        :return: `conflex.Profiler` with the statistics, it is returned by `profile_stop` as well.
+        """
+        from . import profile as m_prof
+        if self._profiler is not None and self._profiler.enabled:
+            return self._profiler
+        self._profiler = m_prof.Profiler(self._schema)
+        self.__class__ = m_prof.profiled_cls(type(self))
+        return self._profiler
+
+    def profile_stop(self):
+        """
+        :return: profiler of the stopped profiling, `None` if the config is not profiled.
+        """
+        from . import profile as m_prof
+        v_ret = self._profiler
+        if v_ret is None:
+            return None
+        v_ret.stop()
+        if type(self).__mro__[1] is m_prof._ProfiledMixin:
+            self.__class__ = type(self).__mro__[2]
+        self._profiler = None
+        return v_ret
+
+    def cache_info(self) -> CacheInfo:
+        """
+        :return: hit and miss counters of the value cache and number of cached values.
+        """
+        return CacheInfo(self._cache_hit_cnt, self._cache_miss_cnt, len(self._state_actual().cache_l))
+
+    def cache_clear(self) -> None:
+        v_st: ConfigState = self._state_actual()
+        self._state = ConfigState(
+            v_st.walker_l, None, v_st.frozen_l, v_st.frozen_absent_l, v_st.version, v_st.parent, v_st.layer_l)
+        self._cache_hit_cnt = 0
+        self._cache_miss_cnt = 0
+
+    def get_many(self, il_path: Sequence[str]) -> List[Any]:
+        """
+        Read several options at once. Compiled paths are merged into a prefix trie so walkers move along every shared
+        prefix once. Defaults, required options and errors are the same as for `config[path]`; if several paths fail
+        the error of the first one is raised.
+
+        :param il_path: option paths, kind prefixes are allowed.
+        :return: values in the order of `il_path`.
+        """
+        v_st: ConfigState = self._state_actual()
+        if v_st.frozen_l is not None:
+            return [self._frozen_get(v_st, v) for v in il_path]
+        l_cache: Dict[str, Any] = v_st.cache_l
+        l_ret: list = [None] * len(il_path)
+        # Raw path of the step -> [step, trie of the next steps, indexes of the paths ending with the step, count of
+        # the unresolved paths ending at or under the step, the path ending with the step is resolved].
+        l_trie: dict = {}
+        for v_idx, v_path in enumerate(il_path):
+            v_ret = l_cache.get(f'{self._path_pref}{v_path}', _NOT_FOUND)
+            if v_ret is _NOT_FOUND:
+                l_step: Tuple[_PathStep, ...] = self._path_step_l(self._path_base, v_path)
+                v_ret = l_cache.get(l_step[-1].path, _NOT_FOUND)
+            if v_ret is not _NOT_FOUND:
+                self._cache_hit_cnt += 1
+                l_ret[v_idx] = list(v_ret) if type(v_ret) is list else v_ret
+                continue
+            l_node: dict = l_trie
+            l_entry: list = []
+            for v_step in l_step:
+                l_entry.append(l_node.setdefault(v_step.path_raw, [v_step, {}, [], 0, False]))
+                l_node = l_entry[-1][1]
+            if not l_entry[-1][2]:
+                for v_entry in l_entry:
+                    v_entry[3] += 1
+            l_entry[-1][2].append(v_idx)
+        # Layers are walked from the top one along the unresolved paths only, like `_value_get` does, so lazy layers
+        # under the layers having the options are not loaded.
+        l_wl: List[ConfTreeWalker] = v_st.walker_l
+        l_default: list = []
+        for v_layer in range(len(l_wl) - 1, -1, -1):
+            if not any(v[3] for v in l_trie.values()):
+                break
+            l_stack: list = [(l_wl[v_layer], l_trie, ())]
+            while len(l_stack):
+                v_wl, l_node, l_parent = l_stack.pop()
+                for v_entry in l_node.values():
+                    if not v_entry[3]:
+                        continue
+                    v_wl_next: ConfTreeWalker = v_wl.step(v_entry[0])
+                    v_exist: bool = v_wl_next.node_exist()
+                    # Only the top layer is walked along missing nodes, it gives the defaults.
+                    if not v_exist and v_layer != len(l_wl) - 1:
+                        continue
+                    l_chain: tuple = l_parent + (v_entry,)
+                    if v_entry[2] and not v_entry[4]:
+                        if v_exist:
+                            self._value_many_set(l_ret, l_cache, v_entry, v_wl_next)
+                            for v in l_chain:
+                                v[3] -= 1
+                        else:
+                            l_default.append((v_entry, v_wl_next))
+                    if len(v_entry[1]):
+                        l_stack.append((v_wl_next, v_entry[1], l_chain))
+        for v_entry, v_wl in l_default:
+            if not v_entry[4]:
+                self._value_many_set(l_ret, l_cache, v_entry, v_wl)
+        for v_ret in l_ret:
+            if type(v_ret) is _ResolveError:
+                v_ret.raise_()
+        return l_ret
+
+    def _value_many_set(self, il_ret: list, il_cache: Dict[str, Any], il_entry: list, iv_walker: ConfTreeWalker):
+        """
+        Resolve the option of the `get_many` trie entry with the winning walker and set it to all its paths.
+        """
+        self._cache_miss_cnt += 1
+        il_entry[4] = True
+        v_ret = _value_resolve([iv_walker], self._parser_l)
+        if type(v_ret) is not _ResolveError:
+            il_cache[il_entry[0].path] = v_ret
+        for v_idx in il_entry[2]:
+            il_ret[v_idx] = list(v_ret) if type(v_ret) is list else v_ret
+
+    def bind(self, iv_cls: type):
+        """
+        Populate dataclass with the config values, hot code reads them as plain attributes then. Fields are mapped to
+        the schema once per class: field name (or `path` item of the field metadata) is the name of the node, `v`
+        field is the value of the node itself. Field of dataclass type is populated from the section (or option with
+        children), field of `Tuple[SomeDataclass, ...]` type from the `slice` items, `Tuple[int, ...]` field gets
+        the list option value as tuple.
+
+        :param iv_cls: dataclass, `slots=True` and `frozen=True` ones are supported.
+        :return: `iv_cls` object.
+        """
+        v_plan: _BindPlan = self._schema.bind_plan(iv_cls, self._path_base)
+        return _bind_build(self, v_plan, self.get_many(v_plan.path_l))
+
+    def _cache_fill(self, iv_state: ConfigState, iv_path: str):
+        l_step: Tuple[_PathStep, ...] = self._path_step_l(self._path_base, iv_path)
+        # `iv_path` may contain kind prefixes, value is cached by the normalized path.
+        l_cache: Dict[str, Any] = iv_state.cache_l
+        v_ret = l_cache.get(l_step[-1].path, _NOT_FOUND)
+        if v_ret is _NOT_FOUND:
+            self._cache_miss_cnt += 1
+            v_ret = self._value_get(iv_state.walker_l, l_step, None, iv_state.layer_l)
+            l_cache[l_step[-1].path] = v_ret
+        else:
+            self._cache_hit_cnt += 1
+        return list(v_ret) if type(v_ret) is list else v_ret
+
+    def _value_get(
+            self, il_walker: List[ConfTreeWalker], il_step: Tuple[_PathStep, ...], il_absent: set = None,
+            il_layer: Mapping[str, Tuple[int, ...]] = None) -> Any:
+        """
+        Resolve the option with the layer index if there is one, with the generated resolver or the generic walk
+        otherwise.
+
+        :param il_walker: walkers positioned at the config base.
+        :param il_absent: set the option path is added to if no source has the option.
+        :param il_layer: layer index of the state `il_walker` are taken from.
+        """
+        if il_layer is not None:
+            # Only the winning layer is walked, the top one gives the default if no layer has the option.
+            l_idx: Tuple[int, ...] = il_layer.get(il_step[-1].path, ())
+            if not l_idx and il_absent is not None:
+                il_absent.add(il_step[-1].path)
+            return self._node_step([il_walker[l_idx[-1] if l_idx else -1]], il_step)[0].value_get(self._parser_l)
+        v_resolve: Optional[Callable] = self._schema.resolver(self._path_base, il_step)
+        if v_resolve is not None:
+            v_ret = v_resolve(il_walker, il_absent)
+            if v_ret is not _FALLBACK:
+                return v_ret
+        # The last layer having the option wins. Layers are walked from the top one, so lower layers (lazy sources in
+        # particular) are not touched if an upper layer has the option.
+        v_wl_top: Optional[ConfTreeWalker] = None
+        for v_wl in reversed(il_walker):
+            v_wl = self._node_step([v_wl], il_step)[0]
+            if v_wl.node_exist():
+                return v_wl.value_get(self._parser_l)
+            if v_wl_top is None:
+                v_wl_top = v_wl
+        if il_absent is not None:
+            il_absent.add(il_step[-1].path)
+        return v_wl_top.value_get(self._parser_l)
+
+    def _frozen_get(self, iv_state: ConfigState, iv_path: str):
+        v_ret = iv_state.frozen_l.get(f'{self._path_pref}{iv_path}', _NOT_FOUND)
+        if v_ret is _NOT_FOUND:
+            # Path is not normalized (kind prefixes) or it is not an option. Compile it to find it out.
+            v_step: _PathStep = self._path_step_l(self._path_base, iv_path)[-1]
+            if v_step.kind == 's':
+                raise TypeError('Sections can not have a value.')
+            v_ret = iv_state.frozen_l[v_step.path]
+        if type(v_ret) is _ResolveError:
+            v_ret.raise_()
+        return v_ret
+
+    def _node_get(self, il_walker: List[ConfTreeWalker], iv_path: str) -> List[ConfTreeWalker]:
+        return self._node_step(il_walker, self._path_step_l(self._path_base, iv_path))
+
+    @staticmethod
+    def _node_step(il_walker: List[ConfTreeWalker], il_step: Tuple[_PathStep, ...]) -> List[ConfTreeWalker]:
+        for v_step in il_step:
+            il_walker = [v.step(v_step) for v in il_walker]
+        return il_walker
+
+    def _sub_state_create(
+            self, iv_state: ConfigState, iv_path: str, iv_idx: int = None, il_walker: List[ConfTreeWalker] = None
+            ) -> ConfigState:
+        """
+        :param iv_state: state of this config.
+        :param iv_path: path of the sub-config relative to this config.
+        :param iv_idx: index of the `slice` item, `None` for `knot`.
+        :param il_walker: walkers of the state already positioned at `iv_path`.
+        :return: state of the sub-config. Knot resolves the same paths over the same sources so it shares the value
+            cache and frozen snapshot.
+        """
+        if il_walker is not None:
+            l_wl: List[ConfTreeWalker] = il_walker
+        elif iv_idx is None:
+            l_wl: List[ConfTreeWalker] = _walker_lazy_step(
+                iv_state.walker_l, self._path_step_l(self._path_base, iv_path))
+        else:
+            l_wl: List[ConfTreeWalker] = self._node_get(iv_state.walker_l, iv_path)
+        if iv_idx is None:
+            # Knot keeps a walker per layer, so the layer index of the config is valid for it.
+            return ConfigState(
+                l_wl, iv_state.cache_l, iv_state.frozen_l, iv_state.frozen_absent_l, iv_state.version, iv_state,
+                iv_state.layer_l)
+        # Same length as `SliceView` gives the list.
+        if all(iv_idx >= len(v.node_l) for v in l_wl):
+            raise IndexError(f'Item {iv_idx} of the list at {iv_path} is not in the config anymore.')
+        return ConfigState([_walker_slice_merge(l_wl, iv_idx)], None, None, frozenset(), iv_state.version, iv_state)
+
+    def _sub_config(
+            self, iv_state: ConfigState, iv_path: str, iv_idx: int = None, il_walker: List[ConfTreeWalker] = None
+            ) -> 'SubConfig':
+        """
+        Create `SubConfig` that shares schema related caches with this config and follows its state.
+        """
+        return self._sub_config_create(self._sub_state_create(iv_state, iv_path, iv_idx, il_walker), iv_path, iv_idx)
+
+    def _sub_config_create(self, iv_state_sub: ConfigState, iv_path: str, iv_idx: Optional[int]) -> 'SubConfig':
+        v_ret = SubConfig(iv_state_sub.walker_l, self._schema)
+        v_ret._state = iv_state_sub
+        v_ret._origin = self
+        v_ret._origin_path = iv_path
+        v_ret._origin_idx = iv_idx
+        return v_ret
+
+    def slice(self, iv_path: str) -> 'SliceView':
+        """
+        :return: sequence of the sub-configs for the items of the list at `iv_path`.
+        """
+        v_st: ConfigState = self._state_actual()
+        l_step: Tuple[_PathStep, ...] = self._path_step_l(self._path_base, iv_path)
+        # Layers without the list size the view as well (a missing marker per item of the parent list), so all layers
+        # are probed even if there is the layer index.
+        return SliceView(self, v_st, iv_path, self._node_step(v_st.walker_l, l_step))
+
+    def columns(self, iv_path: str, il_name: Sequence[str]) -> Dict[str, Union[m_arr.array, list]]:
+        """
+        Resolve options of all items of the list at once, the same values as `[v[name] for v in slice(iv_path)]` but
+        without creating the sub-configs.
+
+        :param iv_path: path of the list of sections or of the list option with children.
+        :param il_name: names of the single valued child options, kind prefixes are allowed; 'v' is the value of the
+            item itself.
+        :return: column name -> `array.array` for `int` and `float` options (list if some value does not fit), list
+            with interned strings for others.
+        """
+        v_view: SliceView = self.slice(iv_path)
+        v_step: _PathStep = v_view._step
+        l_node: list = [v_view._node_get(v) for v in range(len(v_view))]
+        l_ret: dict = {}
+        for v_name in il_name:
+            if v_name == 'v':
+                if v_step.kind == 's':
+                    raise TypeError('Sections can not have a value.')
+                l_raw: list = [
+                    v.get('v') if type(v) is dict or isinstance(v, m_abc.Mapping) else v for v in l_node]
+                l_ret[v_name] = _column_pack(self._parser_l[v_step.path], l_raw, v_step.path_raw)
+                continue
+            v_kind, v_key, v_path, v_path_raw = _key_parse(self._parser_l, v_step.path, v_name)
+            if v_kind != 'v':
+                raise TypeError(f'Column `{v_path_raw}` is not a single valued option.')
+            v_key_kind: str = f'{v_kind}_{v_key}'
+            l_raw: list = []
+            for v_nd in l_node:
+                if type(v_nd) is not dict and not isinstance(v_nd, m_abc.Mapping):
+                    v_raw = _MISSING
+                elif v_key in v_nd:
+                    v_raw = v_nd[v_key]
+                elif v_key_kind in v_nd:
+                    v_raw = v_nd[v_key_kind]
+                else:
+                    v_raw = _MISSING
+                v_type: type = type(v_raw)
+                if v_type is dict or (v_type not in _SCALAR_TYPE_S and isinstance(v_raw, m_abc.Mapping)):
+                    v_raw = v_raw.get('v')
+                l_raw.append(v_raw)
+            l_ret[v_name] = _column_pack(self._parser_l[v_path], l_raw, v_path_raw)
+        return l_ret
+
+    def knot(self, iv_path: str):
+        v_st: ConfigState = self._state_actual()
+        if v_st.frozen_l is None:
+            return self._sub_config(v_st, iv_path)
+        # Only the state is memoized, the sub-config can be reloaded by the caller so every call gets its own.
+        v_st_sub: Optional[ConfigState] = v_st.knot_l.get(iv_path)
+        if v_st_sub is None:
+            v_st_sub = v_st.knot_l[iv_path] = self._sub_state_create(v_st, iv_path)
+        return self._sub_config_create(v_st_sub, iv_path, None)
+
+    def load_dicts(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]], iv_frozen: bool = False) -> None:
+        """
+        :param ill_raw_conf: config sources, latter ones override former. Zero-argument callable is wrapped into
+            `LazySource` and called the first time a lookup reaches its layer. `FlatSource` paths are normalized.
+        :param iv_frozen: call `freeze` after loading.
+        """
+        self._sources_load(ill_raw_conf, not iv_frozen)
+        if iv_frozen:
+            self.freeze()
+
+    def _sources_load(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]], iv_index: bool) -> None:
+        """
+        :param iv_index: build the layer index. Frozen config reads the snapshot, so it does not need it.
+        """
+        l_wl: List[ConfTreeWalker] = self._walker_l_create(ill_raw_conf)
+        self._state = ConfigState(
+            l_wl, iv_version=self._state_actual().version + 1,
+            il_layer=self._layer_index_create(l_wl) if iv_index else None)
+
+    def reload_dicts(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]]) -> AbstractSet[str]:
+        """
+        Replace config sources like `load_dicts` does, but re-resolve only options which source nodes are changed.
+        Sub-trees that are the same objects or equal to the current ones are skipped, values of unchanged options stay
+        in the cache (or in the frozen snapshot). Subscribers of the changed paths are notified.
+
+        :param ill_raw_conf: config sources, latter ones override former.
+        :return: normalized paths of options which values are changed.
+        """
+        v_st, l_changed = self._reload_prepare(self._state_actual(), ill_raw_conf)
+        self._reload_commit(v_st, l_changed)
+        return l_changed
+
+    async def reload_async(
+            self, iv_source_provider: Callable[[], Iterable[Union[Mapping, Iterable]]], iv_executor=None
+            ) -> AbstractSet[str]:
+        """
+        Same as `reload_dicts` for asyncio applications. Sources are obtained and the new state is built in the
+        executor, the event loop only swaps the state reference and notifies subscribers.
+
+        :param iv_source_provider: callable (or coroutine function) returning config sources.
+        :param iv_executor: `concurrent.futures.Executor`, default executor of the loop if omitted.
+        :return: normalized paths of options which values are changed.
+        """
+        v_loop = m_aio.get_running_loop()
+        if m_aio.iscoroutinefunction(iv_source_provider):
+            l_raw_conf: list = list(await iv_source_provider())
+        else:
+            l_raw_conf: list = await v_loop.run_in_executor(iv_executor, lambda: list(iv_source_provider()))
+        while True:
+            v_st_base: ConfigState = self._state_actual()
+            v_st, l_changed = await v_loop.run_in_executor(iv_executor, self._reload_prepare, v_st_base, l_raw_conf)
+            # The state is replaced by somebody else meanwhile, the difference has to be computed again.
+            if v_st_base is self._state_actual():
+                break
+        self._reload_commit(v_st, l_changed)
+        return l_changed
+
+    def _reload_commit(self, iv_state: ConfigState, il_changed: AbstractSet[str]) -> None:
+        """
+        Publish the state built by `_reload_prepare`. It runs in the thread of the reload caller (the event loop for
+        `reload_async`), `_reload_prepare` may run in any thread, so it does not change the config.
+        """
+        self._state = iv_state
+        self._changed_notify(il_changed)
+
+    def _reload_prepare(
+            self, iv_state: ConfigState, ill_raw_conf: Iterable[Union[Mapping, Iterable]]
+            ) -> Tuple[ConfigState, AbstractSet[str]]:
+        """
+        :return: new state for the `reload_dicts` and the set of changed option paths.
+        """
+        v_st: ConfigState = iv_state
+        l_wl_old: List[ConfTreeWalker] = v_st.walker_l
+        l_wl_new: List[ConfTreeWalker] = self._walker_l_create(ill_raw_conf)
+        l_cache: Dict[str, Any] = dict(v_st.cache_l)
+        l_frozen: Optional[Dict[str, Any]] = None if v_st.frozen_l is None else dict(v_st.frozen_l)
+        l_absent: set = set(v_st.frozen_absent_l)
+        l_changed: set = set()
+        # Layer index of the same layers is updated along the changed nodes only.
+        l_layer: Optional[Dict[str, Tuple[int, ...]]] = None
+        if v_st.layer_l is not None and len(l_wl_old) == len(l_wl_new) and _layer_index_fit(l_wl_new):
+            l_layer = dict(v_st.layer_l)
+            l_layer.pop(self._path_base, None)
+            l_idx: Tuple[int, ...] = tuple(v_idx for v_idx, v in enumerate(l_wl_new) if v.node_exist())
+            if self._path_base and l_idx:
+                l_layer[self._path_base] = l_idx
+        l_wl_it: Iterable[Tuple[str, List[ConfTreeWalker], List[ConfTreeWalker]]] = _walker_tree_diff(
+            l_wl_old, l_wl_new, self._parser_l, self._schema.child_l,
+            self._path_base)
+        if self._path_base and self._parser_l[self._path_base].kind != 's' and not _walker_same(l_wl_old, l_wl_new):
+            l_wl_it = m_it.chain([(self._path_base, l_wl_old, l_wl_new)], l_wl_it)
+        for v_path, l_wl_old_nd, l_wl_new_nd in l_wl_it:
+            if l_layer is not None:
+                l_idx = tuple(v_idx for v_idx, v in enumerate(l_wl_new_nd) if v.node_exist())
+                if l_idx:
+                    l_layer[v_path] = l_idx
+                else:
+                    l_layer.pop(v_path, None)
+            if self._parser_l[v_path].kind == 's':
+                continue
+            if l_frozen is not None:
+                v_val_old = l_frozen[v_path]
+            else:
+                v_val_old = l_cache.pop(v_path, _NOT_FOUND)
+                if v_val_old is _NOT_FOUND:
+                    v_val_old = _value_resolve(l_wl_old_nd, self._parser_l)
+            v_val_new = _value_resolve(l_wl_new_nd, self._parser_l)
+            if l_frozen is not None:
+                l_frozen[v_path] = v_val_new
+                if any(v.node_exist() for v in l_wl_new_nd):
+                    l_absent.discard(v_path)
+                else:
+                    l_absent.add(v_path)
+            elif type(v_val_new) is not _ResolveError:
+                l_cache[v_path] = v_val_new
+            if not _value_same(v_val_old, v_val_new):
+                l_changed.add(v_path)
+        if l_frozen is None and l_layer is None:
+            l_layer = self._layer_index_create(l_wl_new)
+        return ConfigState(
+            l_wl_new, l_cache, l_frozen, l_absent if l_frozen is not None else frozenset(), v_st.version + 1,
+            il_layer=l_layer), l_changed
+
+    def load_files(
+            self, il_path: Iterable[str], iv_loader: Callable[[str], Mapping] = None, iv_frozen: bool = False,
+            iv_executor=None, iv_cache_path: str = None) -> Dict[str, float]:
+        """
+        Load config sources from files. Files are parsed concurrently. Identity of every file (mtime, size, inode) is
+        kept for `files_refresh` and `watch`.
+
+        :param il_path: paths of the files, latter ones override former.
+        :param iv_loader: callable that parses the file at the given path into `Mapping`. By default JSON is used for
+            `.json` files and YAML (`PyYAML` package is required, libyaml loader is preferred) for others.
+        :param iv_frozen: call `freeze` after loading.
+        :param iv_executor: `concurrent.futures.Executor` to parse files in, thread pool is used if omitted.
+        :param iv_cache_path: path of the compiled cache file. It keeps parsed files and the frozen snapshot; while the
+            schema and files are the same they are loaded from it without parsing. Otherwise the cache is rewritten.
+        :return: parse time in seconds of every file, zeros if loaded from the cache.
+        """
+        l_source: List[m_src.FileSource] = [m_src.FileSource(v, iv_loader) for v in il_path]
+        if iv_cache_path is None:
+            m_src.sources_refresh(l_source, iv_executor)
+            self.load_dicts([v.data for v in l_source], iv_frozen)
+        else:
+            self._files_cached_load(l_source, iv_loader, iv_frozen, iv_executor, iv_cache_path)
+        self._file_source_l = l_source
+        return {v.path: v.parse_time for v in l_source}
+
+    def _files_cached_load(
+            self, il_source: List['m_src.FileSource'], iv_loader: Optional[Callable[[str], Mapping]], iv_frozen: bool,
+            iv_executor, iv_cache_path: str) -> None:
+        v_key: tuple = (self._schema.fingerprint, self._path_base, m_src.loader_id(iv_loader))
+        l_cache: Optional[dict] = m_src.cache_read(iv_cache_path, v_key, il_source)
+        if l_cache is not None:
+            self._sources_load([v.data for v in il_source], not iv_frozen)
+            if iv_frozen:
+                v_st: ConfigState = self._state
+                self._state = ConfigState(
+                    v_st.walker_l, v_st.cache_l, l_cache['frozen_l'], l_cache['frozen_absent_l'], v_st.version,
+                    v_st.parent, v_st.layer_l)
+            if all(v_f[1] == v_s.ident for v_f, v_s in zip(l_cache['file_l'], il_source)):
+                return
+            # Files are touched but not changed, identities are updated to skip hashing on the next load.
+            v_st_frozen = self._state if iv_frozen else None
+        else:
+            m_src.sources_refresh(il_source, iv_executor)
+            self.load_dicts([v.data for v in il_source], iv_frozen)
+            v_st_frozen = None
+        v_st: ConfigState = self._state
+        if v_st_frozen is None:
+            self.freeze()
+            v_st_frozen = self._state
+            if not iv_frozen:
+                self._state = v_st
+        try:
+            m_src.cache_write(
+                iv_cache_path, v_key, il_source, frozen_l=v_st_frozen.frozen_l,
+                frozen_absent_l=v_st_frozen.frozen_absent_l)
+        except Exception:
+            gv_log.warning('Config cache `%s` is not written.', iv_cache_path, exc_info=True)
+
+    def files_refresh(self, iv_executor=None) -> AbstractSet[str]:
+        """
+        Re-parse files loaded by `load_files` which identity is changed and apply them with `reload_dicts`.
+
+        :param iv_executor: `concurrent.futures.Executor` to parse files in, thread pool is used if omitted.
+        :return: normalized paths of options which values are changed.
+        """
+        l_source: List[m_src.FileSource] = self._file_source_l
+        if not any(m_src.sources_refresh(l_source, iv_executor)):
+            return set()
+        return self.reload_dicts([v.data for v in l_source])
+
+    def watch(self, iv_interval: float = 1.0) -> 'm_src.FileWatcher':
+        """
+        Start daemon thread that calls `files_refresh` every `iv_interval` seconds. New state is published with a single
+        reference swap so readers in other threads need no locks.
+
+        :return: started watcher, call its `stop` method to finish watching.
+        """
+        v_ret = m_src.FileWatcher(self, iv_interval)
+        v_ret.start()
+        return v_ret
+
+    def subscribe(self, iv_path: str, iv_callback) -> None:
+        """
+        Register callback for changes made by `reload_dicts`.
+
+        :param iv_path: path of the section or option to watch, empty string for the whole config.
+        :param iv_callback: callable that receives set of the changed option paths under `iv_path`.
+        """
+        v_path: str = self._path_step_l(self._path_base, iv_path)[-1].path if iv_path else self._path_base
+        self._subscriber_l.setdefault(v_path, []).append(iv_callback)
+
+    def unsubscribe(self, iv_path: str, iv_callback) -> None:
+        v_path: str = self._path_step_l(self._path_base, iv_path)[-1].path if iv_path else self._path_base
+        self._subscriber_l[v_path].remove(iv_callback)
+        if not len(self._subscriber_l[v_path]):
+            del self._subscriber_l[v_path]
+
+    def _changed_notify(self, il_changed: AbstractSet[str]) -> None:
+        if not len(il_changed):
+            return
+        for v_path, l_callback in list(self._subscriber_l.items()):
+            v_pref: str = f'{v_path}{NODE_SEP}' if v_path else ''
+            l_changed_sub: set = {v for v in il_changed if v == v_path or v.startswith(v_pref)}
+            if not len(l_changed_sub):
+                continue
+            for v_callback in list(l_callback):
+                try:
+                    v_callback(l_changed_sub)
+                except Exception:
+                    gv_log.exception(f'Config change callback for `{v_path}` failed.')
+
+    def _layer_index_create(self, il_walker: List[ConfTreeWalker]) -> Optional[Dict[str, Tuple[int, ...]]]:
+        return _layer_index_create(il_walker, self._parser_l, self._schema.child_l)
+
+    def _walker_l_create(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]]) -> List[ConfTreeWalker]:
+        """
+        :return: walkers over the sources positioned at the root of this config.
+        """
         l_wl: List[ConfTreeWalker] = []
         for l_raw_conf in ill_raw_conf:
-            if isinstance(l_raw_conf, Mapping):
+            if type(l_raw_conf) is m_src.FlatSource:
+                l_wl.append(ConfTreeWalker([l_raw_conf.normalize(lambda v: self._path_step_l('', v)[-1].path)]))
+            elif isinstance(l_raw_conf, Mapping):
                 l_wl.append(ConfTreeWalker([l_raw_conf]))
+            elif callable(l_raw_conf):
+                l_wl.append(ConfTreeWalker([m_src.LazySource(l_raw_conf)]))
             else:
                 l_wl.append(ConfTreeWalker([dict(l_raw_conf)]))
-        self._walker_l = l_wl
+        return l_wl
 
 
 class SubConfig(Config):
     """
     Class inherited from `Config` represent sub-tree of configuration.
     `Config.node` and `Config.slice` returns objects of this type.
+    Sub-config taken from another config follows its state: after the origin is reloaded the sub-config reads the new
+    version. Use `pin` to keep the version.
     """
-    def __init__(self, il_parent_walker: List[ConfTreeWalker], il_parser: Mapping[str, OptionAbc]):
-        super().__init__()
-        assert all(type(v) is ConfTreeWalker for v in il_parent_walker)
-        self._walker_l = il_parent_walker
-        self._parser_l = il_parser
+    __slots__ = ('kind', 'path', '_origin', '_origin_path', '_origin_idx')
+
+    def __init__(
+            self, il_parent_walker: List[ConfTreeWalker], il_parser: Union[Schema, Mapping[str, OptionAbc]],
+            il_frozen: Dict[str, Any] = None, il_frozen_absent: AbstractSet[str] = frozenset()):
+        super().__init__(il_parser if type(il_parser) is Schema else Schema(il_parser))
+        assert all(isinstance(v, ConfTreeWalker) for v in il_parent_walker)
+        self._state = ConfigState(il_parent_walker, None, il_frozen, il_frozen_absent)
         self.kind = il_parent_walker[0].kind
         self.path = il_parent_walker[0].path_raw
+        self._path_base = il_parent_walker[0].path
+        self._path_pref = f'{il_parent_walker[0].path}{NODE_SEP}' if il_parent_walker[0].path else ''
+        self._origin: Optional[Config] = None
+        self._origin_path: str = ''
+        self._origin_idx: Optional[int] = None
+
+    def __getitem__(self, item: str):
+        self._state_actual()
+        return super().__getitem__(item)
+
+    def _state_actual(self) -> ConfigState:
+        v_origin: Optional[Config] = self._origin
+        if v_origin is not None:
+            v_st_origin: ConfigState = v_origin._state_actual()
+            if self._state.parent is not v_st_origin:
+                self._state = v_origin._sub_state_create(v_st_origin, self._origin_path, self._origin_idx)
+        return self._state
+
+    def pin(self) -> 'SubConfig':
+        v_ret: SubConfig = super().pin()
+        v_ret._origin = None
+        return v_ret
+
+    def _sources_load(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]], iv_index: bool) -> None:
+        self._state_actual()
+        self._origin = None
+        super()._sources_load(ill_raw_conf, iv_index)
+
+    def _reload_commit(self, iv_state: ConfigState, il_changed: AbstractSet[str]) -> None:
+        # Sub-config with its own sources does not follow the origin anymore.
+        self._origin = None
+        super()._reload_commit(iv_state, il_changed)
 
     @property
     def v(self):
-        return _walker_knot_merge(self._walker_l).value_get(self._parser_l)
-
-    def load_dicts(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]]) -> None:
-        l_wl: List[ConfTreeWalker] = []
-        for l_raw_conf in ill_raw_conf:
-            if isinstance(l_raw_conf, Mapping):
-                l_wl.append(ConfTreeWalker([l_raw_conf]))
-            else:
-                l_wl.append(ConfTreeWalker([dict(l_raw_conf)]))
-        self._walker_l = self._node_get(l_wl, self._walker_l[0].path_raw)
-
-
-class ConfigItemsView(Iterable, Sized):
-    def __init__(self, il_walker: List[ConfTreeWalker], il_parser: Mapping[str, OptionAbc]):
-        assert all(type(v) is ConfTreeWalker for v in il_walker)
-        self._walker_l = il_walker
-        self._parser_l = il_parser
-        self._opt_path_l = set((v_k for v_k, v_i in il_parser.items() if v_i.kind != 's'))
+        v_st: ConfigState = self._state_actual()
+        if v_st.frozen_l is not None:
+            if self.kind == 's':
+                raise TypeError('Sections can not have a value.')
+            v_ret = v_st.frozen_l[self._path_base]
+            if type(v_ret) is _ResolveError:
+                v_ret.raise_()
+            return v_ret
+        if v_st.layer_l is not None:
+            l_idx: Tuple[int, ...] = v_st.layer_l.get(self._path_base, ())
+            return v_st.walker_l[l_idx[-1] if l_idx else -1].value_get(self._parser_l)
+        # Same as `_walker_knot_merge`, but from the top layer, so lazy layers under the winning one are not loaded.
+        for v_wl in reversed(v_st.walker_l):
+            if v_wl.node_exist():
+                return v_wl.value_get(self._parser_l)
+        return v_st.walker_l[-1].value_get(self._parser_l)
+
+    def _walker_l_create(self, ill_raw_conf: Iterable[Union[Mapping, Iterable]]) -> List[ConfTreeWalker]:
+        return _walker_lazy_step(super()._walker_l_create(ill_raw_conf), self._path_step_l('', self.path))
+
+
+class SliceView(Sequence):
+    """
+    Items of the list returned by `Config.slice`. The item node of every index is taken from the last layer having
+    it, the winner is found on the first access to the index and kept, so indexing is O(1) after that. Length is fixed
+    by the config state the view is created from, items follow the config like `knot` does. `next(view)` returns the
+    items one by one like the generator `slice` returned before, its cursor does not affect `iter(view)`.
+    """
+    __slots__ = ('_conf', '_state', '_path', '_step', '_walker_l', '_node_l', '_cursor')
+
+    def __init__(self, iv_conf: Config, iv_state: ConfigState, iv_path: str, il_walker: List[ConfTreeWalker]):
+        """
+        :param il_walker: walkers of `iv_state` positioned at `iv_path`.
+        """
+        self._conf: Config = iv_conf
+        self._state: ConfigState = iv_state
+        self._path: str = iv_path
+        self._step: _PathStep = _walker_slice_step(il_walker)
+        self._walker_l: List[ConfTreeWalker] = il_walker
+        self._node_l: list = [_NOT_FOUND] * max(len(v.node_l) for v in il_walker)
+        self._cursor: int = 0
 
-    def __iter__(self):
-        return ConfigIter(SubConfig(self._walker_l, self._parser_l), self._opt_path_l)
+    def __len__(self) -> int:
+        return len(self._node_l)
+
+    def __getitem__(self, iv_idx: Union[int, slice]) -> Union['SubConfig', List['SubConfig']]:
+        if type(iv_idx) is slice:
+            return [self._item_get(v) for v in range(*iv_idx.indices(len(self._node_l)))]
+        if iv_idx < 0:
+            iv_idx += len(self._node_l)
+        if not 0 <= iv_idx < len(self._node_l):
+            raise IndexError('Slice index out of range.')
+        return self._item_get(iv_idx)
+
+    def __iter__(self) -> Iterator['SubConfig']:
+        for v_idx in range(len(self._node_l)):
+            yield self._item_get(v_idx)
+
+    def __next__(self) -> 'SubConfig':
+        if self._cursor >= len(self._node_l):
+            raise StopIteration
+        self._cursor += 1
+        return self._item_get(self._cursor - 1)
+
+    def _node_get(self, iv_idx: int):
+        v_ret = self._node_l[iv_idx]
+        if v_ret is _NOT_FOUND:
+            v_ret = None
+            for v_wl in reversed(self._walker_l):
+                l_node: list = v_wl.node_l
+                if iv_idx < len(l_node) and l_node[iv_idx] is not None and l_node[iv_idx] is not _MISSING:
+                    v_ret = l_node[iv_idx]
+                    break
+            self._node_l[iv_idx] = v_ret
+        return v_ret
+
+    def _item_get(self, iv_idx: int) -> 'SubConfig':
+        v_st: ConfigState = self._state
+        return self._conf._sub_config_create(
+            ConfigState(
+                [ConfTreeWalker([self._node_get(iv_idx)], self._step)], None, None, frozenset(), v_st.version, v_st),
+            self._path, iv_idx)
+
+
+class _ConfigView(Iterable, Sized):
+    """
+    Base class for `items`, `keys` and `values` views. Option paths are relative to the config root. All options are
+    resolved with a single depth-first walk of the schema so shared path prefixes are walked once.
+    """
+    def __init__(self, iv_conf: Config):
+        v_st: ConfigState = iv_conf._state_actual()
+        assert all(isinstance(v, ConfTreeWalker) for v in v_st.walker_l)
+        self._conf = iv_conf
+        self._walker_l = v_st.walker_l
+        self._parser_l = iv_conf._parser_l
+        self._frozen_l = v_st.frozen_l
+        self._frozen_absent_l = v_st.frozen_absent_l
+        self._layer_l = v_st.layer_l
+        self._child_l = iv_conf._schema.child_l
+        self._pref_len = len(iv_conf._path_pref)
+        # Relative path -> full path, in the depth-first order.
+        self._opt_path_l: Dict[str, str] = iv_conf._schema.opt_path_l(iv_conf._path_base)
 
     def __len__(self) -> int:
         return len(self._opt_path_l)
 
+    def _walk(self) -> Iterator[Tuple[str, Any]]:
+        if self._frozen_l is not None:
+            for v_path_rel, v_path in self._opt_path_l.items():
+                v_ret = self._frozen_l[v_path]
+                if type(v_ret) is _ResolveError:
+                    v_ret.raise_()
+                yield v_path_rel, v_ret
+            return
+        v_conf: Config = self._conf
+        if v_conf._schema.codegen or self._layer_l is not None:
+            for v_path_rel in self._opt_path_l:
+                yield v_path_rel, v_conf._value_get(
+                    self._walker_l, v_conf._path_step_l(v_conf._path_base, v_path_rel), None, self._layer_l)
+            return
+        for l_wl in _walker_tree_walk(self._walker_l, self._parser_l, self._child_l):
+            if l_wl[0].kind != 's':
+                yield l_wl[0].path[self._pref_len:], _walker_knot_merge(l_wl).value_get(self._parser_l)
+
+
+class ConfigItemsView(_ConfigView):
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        return self._walk()
+
     def __contains__(self, iv: Tuple[str, Any]) -> bool:
         assert type(iv) is tuple and len(iv) == 2
         assert isinstance(iv[0], str), r'Option path is not a str.'
@@ -477,24 +2071,31 @@ class ConfigItemsView(Iterable, Sized):
             return False
         if v_path not in self._opt_path_l:
             return False
-        l_wl = [m_cp.copy(v) for v in self._walker_l]
-        for v_key_raw in v_path.split(NODE_SEP):
+        if self._frozen_l is not None:
+            v_path = self._opt_path_l[v_path]
+            if v_path in self._frozen_absent_l:
+                return False
+            v_val = self._frozen_l[v_path]
+            return type(v_val) is not _ResolveError and v_val == iv[1]
+        l_wl = self._walker_l
+        for v_step in self._conf._path_step_l(self._conf._path_base, v_path):
+            l_wl = [v.step(v_step) for v in l_wl]
             v_exist: bool = False
             for v in l_wl:
-                v.move(self._parser_l, v_key_raw)
                 v_exist = v_exist or v.node_exist()
             if not v_exist:
                 return False
         return _walker_knot_merge(l_wl).value_get(self._parser_l) == iv[1]
 
 
-class ConfigIter:
-    # !!!TODO: optimize this. switch to use `ConfTreeWalker`.
-    def __init__(self, iv_parent: SubConfig, il_path: Iterable[str]):
-        self._conf = iv_parent
-        self._path_offset = len(self._conf.path)
-        self._path_iter = il_path.__iter__()
+class ConfigKeysView(_ConfigView):
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._opt_path_l)
+
+    def __contains__(self, iv: str) -> bool:
+        return iv in self._opt_path_l
+
 
-    def __next__(self):
-        v_path = self._path_iter.__next__()[self._path_offset:]
-        return v_path, self._conf[v_path]
+class ConfigValuesView(_ConfigView):
+    def __iter__(self) -> Iterator[Any]:
+        return (v for _, v in self._walk())
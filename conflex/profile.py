@@ -0,0 +1,238 @@
+"""
+Opt-in access profiling of `Config` reads, see `Config.profile_start`.
+
+Profiled config gets a subclass of its own class that records the reads, the class is swapped back when profiling
+stops. So reads of a config that is not profiled run exactly the same code as before.
+"""
+import functools as m_ft
+import time as m_time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import main as m_main
+
+
+class ProfileEntry(NamedTuple):
+    """Access statistics of one option.
+
+    `layer_cnt` maps the index of the source layer (in the sources of the config the read is done through) that won
+    the read to the count of such reads. Reads that fell back to the default are counted in `default_cnt` only.
+    `resolve_time` is the time of finding the option in the sources, `parse_time` of `value_parse` and filling
+    defaults, both are in seconds and are summed over cache misses only.
+    """
+    path: str
+    read_cnt: int
+    resolve_cnt: int
+    resolve_time: float
+    parse_time: float
+    default_cnt: int
+    layer_cnt: Dict[int, int]
+
+
+class _Stat:
+    __slots__ = ('read_cnt', 'resolve_cnt', 'resolve_time', 'parse_time', 'default_cnt', 'layer_cnt')
+
+    def __init__(self):
+        self.read_cnt: int = 0
+        self.resolve_cnt: int = 0
+        self.resolve_time: float = 0.0
+        self.parse_time: float = 0.0
+        self.default_cnt: int = 0
+        self.layer_cnt: Dict[int, int] = {}
+
+
+class Profiler:
+    """
+    Statistics of the reads of the config it is started for and of the sub-configs taken from it while profiling.
+    """
+    __slots__ = ('enabled', '_schema', '_stat_l', '_layer_last')
+
+    def __init__(self, iv_schema: 'm_main.Schema'):
+        self.enabled: bool = True
+        self._schema: m_main.Schema = iv_schema
+        self._stat_l: Dict[str, _Stat] = {}
+        # Winning layer of the last resolve, `False` if there was no resolve.
+        self._layer_last = False
+
+    def stop(self) -> None:
+        """
+        Stop recording. Sub-configs taken while profiling stay instances of the profiled class, but do not record.
+        """
+        self.enabled = False
+
+    def clear(self) -> None:
+        self._stat_l = {}
+
+    def report(self, iv_key: str = 'read_cnt') -> List[ProfileEntry]:
+        """
+        :param iv_key: `ProfileEntry` field to sort by, descending.
+        :return: statistics of the options which were read.
+        """
+        l_ret: List[ProfileEntry] = [
+            ProfileEntry(
+                v_path, v.read_cnt, v.resolve_cnt, v.resolve_time, v.parse_time, v.default_cnt, dict(v.layer_cnt))
+            for v_path, v in self._stat_l.items()]
+        l_ret.sort(key=lambda v: getattr(v, iv_key), reverse=True)
+        return l_ret
+
+    def unread(self) -> List[str]:
+        """
+        :return: paths of the schema options that were never read, candidates to drop from the schema.
+        """
+        return [
+            v_path for v_path, v_parser in self._schema.parser_l.items()
+            if v_parser.kind != 's' and v_path not in self._stat_l]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        :return: JSON-serializable report: `options` with `ProfileEntry` fields by path and the `unread` list.
+        """
+        return {
+            'options': {
+                v.path: {**v._asdict(), 'layer_cnt': {str(v_idx): v_cnt for v_idx, v_cnt in v.layer_cnt.items()}}
+                for v in self.report()},
+            'unread': self.unread()}
+
+    def _stat_get(self, iv_path: str) -> _Stat:
+        v_ret: Optional[_Stat] = self._stat_l.get(iv_path)
+        if v_ret is None:
+            v_ret = self._stat_l[iv_path] = _Stat()
+        return v_ret
+
+    def _resolve_add(self, iv_path: str, iv_resolve_time: float, iv_parse_time: float, iv_layer: Optional[int]):
+        v_stat: _Stat = self._stat_get(iv_path)
+        v_stat.resolve_cnt += 1
+        v_stat.resolve_time += iv_resolve_time
+        v_stat.parse_time += iv_parse_time
+        self._layer_last = iv_layer
+
+    def _read_add(self, iv_conf: 'm_main.Config', iv_path: str) -> None:
+        l_step: Tuple[m_main._PathStep, ...] = iv_conf._path_step_l(iv_conf._path_base, iv_path)
+        v_layer = self._layer_last
+        if v_layer is False:
+            # Value is taken from the cache or from the frozen snapshot.
+            v_layer = _layer_find(iv_conf._state_actual().walker_l, l_step)
+        self._layer_last = False
+        v_stat: _Stat = self._stat_get(l_step[-1].path)
+        v_stat.read_cnt += 1
+        if v_layer is None:
+            v_stat.default_cnt += 1
+        else:
+            v_stat.layer_cnt[v_layer] = v_stat.layer_cnt.get(v_layer, 0) + 1
+
+
+def _layer_find(il_walker: List['m_main.ConfTreeWalker'], il_step: Tuple['m_main._PathStep', ...]) -> Optional[int]:
+    """
+    :return: index of the last layer having the option, `None` if the option falls back to the default.
+    """
+    for v_idx in range(len(il_walker) - 1, -1, -1):
+        if m_main.Config._node_step([il_walker[v_idx]], il_step)[0].node_exist():
+            return v_idx
+    return None
+
+
+class _ProfiledMixin:
+    __slots__ = ()
+
+    def __getitem__(self, item: str):
+        v_prof: Profiler = self._profiler
+        if not v_prof.enabled:
+            return super().__getitem__(item)
+        v_prof._layer_last = False
+        v_ret = super().__getitem__(item)
+        v_prof._read_add(self, item)
+        return v_ret
+
+    def _value_get(self, il_walker, il_step, il_absent: set = None, il_layer=None) -> Any:
+        v_prof: Profiler = self._profiler
+        if not v_prof.enabled:
+            return super()._value_get(il_walker, il_step, il_absent, il_layer)
+        # Generic walk of `Config._value_get`, split into the timed search and the timed parse.
+        v_start: float = m_time.perf_counter()
+        v_layer: Optional[int] = None
+        v_wl_top: Optional[m_main.ConfTreeWalker] = None
+        v_wl_win: Optional[m_main.ConfTreeWalker] = None
+        for v_idx in range(len(il_walker) - 1, -1, -1):
+            v_wl = self._node_step([il_walker[v_idx]], il_step)[0]
+            if v_wl.node_exist():
+                v_layer, v_wl_win = v_idx, v_wl
+                break
+            if v_wl_top is None:
+                v_wl_top = v_wl
+        if v_wl_win is None:
+            v_wl_win = v_wl_top
+            if il_absent is not None:
+                il_absent.add(il_step[-1].path)
+        v_found: float = m_time.perf_counter()
+        try:
+            return v_wl_win.value_get(self._parser_l)
+        finally:
+            v_prof._resolve_add(il_step[-1].path, v_found - v_start, m_time.perf_counter() - v_found, v_layer)
+
+    def get_many(self, il_path):
+        v_prof: Profiler = self._profiler
+        if not v_prof.enabled:
+            return super().get_many(il_path)
+        v_ret: list = super().get_many(il_path)
+        for v_path in il_path:
+            v_prof._read_add(self, v_path)
+        return v_ret
+
+    def _value_many_set(self, il_ret: list, il_cache, il_entry: list, iv_walker) -> None:
+        v_prof: Profiler = self._profiler
+        if not v_prof.enabled:
+            return super()._value_many_set(il_ret, il_cache, il_entry, iv_walker)
+        # `get_many` walks the shared path prefixes once for all options, so only the parse is timed.
+        v_start: float = m_time.perf_counter()
+        try:
+            super()._value_many_set(il_ret, il_cache, il_entry, iv_walker)
+        finally:
+            v_prof._resolve_add(il_entry[0].path, 0.0, m_time.perf_counter() - v_start, None)
+            # Winning layer is looked up by `_read_add`.
+            v_prof._layer_last = False
+
+    def items(self):
+        if not self._profiler.enabled:
+            return super().items()
+        return _ProfiledItemsView(self)
+
+    def values(self):
+        if not self._profiler.enabled:
+            return super().values()
+        return _ProfiledValuesView(self)
+
+    def _sub_config_create(self, iv_state_sub, iv_path: str, iv_idx: Optional[int]):
+        v_ret = super()._sub_config_create(iv_state_sub, iv_path, iv_idx)
+        if self._profiler.enabled:
+            v_ret._profiler = self._profiler
+            v_ret.__class__ = profiled_cls(type(v_ret))
+        return v_ret
+
+
+class _ProfiledViewMixin:
+    def _walk(self) -> Iterator[Tuple[str, Any]]:
+        v_conf: m_main.Config = self._conf
+        v_prof: Profiler = v_conf._profiler
+        v_prof._layer_last = False
+        for v_path_rel, v_ret in super()._walk():
+            if v_prof.enabled:
+                v_prof._read_add(v_conf, v_path_rel)
+            yield v_path_rel, v_ret
+
+
+class _ProfiledItemsView(_ProfiledViewMixin, m_main.ConfigItemsView):
+    pass
+
+
+class _ProfiledValuesView(_ProfiledViewMixin, m_main.ConfigValuesView):
+    pass
+
+
+@m_ft.lru_cache(maxsize=None)
+def profiled_cls(iv_cls: type) -> type:
+    """
+    :return: subclass of the config class `iv_cls` which records reads to the `_profiler` of the object. Instance
+        layout is the same, so the object class can be swapped in place.
+    """
+    if issubclass(iv_cls, _ProfiledMixin):
+        return iv_cls
+    return type(iv_cls.__name__, (_ProfiledMixin, iv_cls), {'__slots__': (), '__module__': iv_cls.__module__})
@@ -0,0 +1,277 @@
+"""
+Resolved config published into memory-mapped files for pre-forked and multiprocessing workers.
+
+Parent process publishes the frozen snapshot with `SharedPublisher.publish`, workers read it with `SharedConfig`.
+Values are pickled one by one into a read-only mapped file which pages are shared by all processes, a worker decodes
+only the values it reads. Every publish writes a new generation file and bumps the counter in the small pointer file,
+readers switch to the new generation on the next read. Files are best placed in `/dev/shm` (default if it exists).
+Files are created readable by the owner only; they are unpickled, so they must be writable by trusted users only.
+"""
+import io as m_io
+import mmap as m_mm
+import os as m_os
+import pickle as m_pk
+import struct as m_st
+import tempfile as m_tf
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence, Tuple, Union
+
+from . import main as m_main
+from . import source as m_src
+
+# Layout version of the published files.
+gv_shared_format: int = 1
+
+_MAGIC: bytes = b'CONFLEXS'
+# Pointer file: magic, current generation (0 if nothing is published yet).
+_POINTER: m_st.Struct = m_st.Struct('<8sQ')
+# Generation file: magic, format, generation, size of the pickled index. Index and values follow.
+_HEADER: m_st.Struct = m_st.Struct('<8sIQQ')
+
+
+def shared_dir_default() -> str:
+    """
+    :return: directory for the published files, memory backed `/dev/shm` if there is one.
+    """
+    return '/dev/shm' if m_os.path.isdir('/dev/shm') else m_tf.gettempdir()
+
+
+def _generation_path(iv_path: str, iv_generation: int) -> str:
+    return f'{iv_path}.{iv_generation}'
+
+
+def _file_write(iv_path: str, iv_data: bytes) -> None:
+    v_tmp: str = f'{iv_path}.tmp{m_os.getpid()}'
+    with open(m_os.open(v_tmp, m_os.O_WRONLY | m_os.O_CREAT | m_os.O_TRUNC, 0o600), 'wb') as v_file:
+        v_file.write(iv_data)
+    m_os.replace(v_tmp, iv_path)
+
+
+def snapshot_encode(il_frozen: Mapping[str, Any], iv_generation: int) -> bytes:
+    """
+    :param il_frozen: normalized path -> resolved value (`_ResolveError` for the failed ones).
+    :return: content of the generation file: header, pickled `path -> (offset, size)` index and pickled values.
+    """
+    v_value_io = m_io.BytesIO()
+    v_pickler = m_src._CachePickler(v_value_io, m_pk.HIGHEST_PROTOCOL)
+    l_index: Dict[str, Tuple[int, int]] = {}
+    for v_path, v_value in il_frozen.items():
+        v_off: int = v_value_io.tell()
+        v_pickler.clear_memo()
+        v_pickler.dump(v_value)
+        l_index[v_path] = (v_off, v_value_io.tell() - v_off)
+    v_index: bytes = m_pk.dumps(l_index, m_pk.HIGHEST_PROTOCOL)
+    return b''.join((
+        _HEADER.pack(_MAGIC, gv_shared_format, iv_generation, len(v_index)), v_index, v_value_io.getbuffer()))
+
+
+class SharedPublisher:
+    """
+    Writer of the published config generations. Only one publisher per path is supported.
+    """
+    __slots__ = ('path', 'generation', '_pointer_mm')
+
+    def __init__(self, iv_name: str, iv_dir: str = None):
+        """
+        :param iv_name: file name of the pointer file, generation files are named `<name>.<generation>`.
+        :param iv_dir: directory of the files, `shared_dir_default()` if omitted.
+        """
+        self.path: str = m_os.path.join(shared_dir_default() if iv_dir is None else iv_dir, iv_name)
+        if not m_os.path.exists(self.path):
+            _file_write(self.path, _POINTER.pack(_MAGIC, 0))
+        with open(self.path, 'r+b') as v_file:
+            self._pointer_mm = m_mm.mmap(v_file.fileno(), _POINTER.size)
+        v_magic, v_generation = _POINTER.unpack_from(self._pointer_mm)
+        if v_magic != _MAGIC:
+            raise ValueError(f'File `{self.path}` is not a published config.')
+        # Generations continue after the previous publisher, so readers never see the counter going back.
+        self.generation: int = v_generation
+
+    def publish(self, iv_conf: 'm_main.Config') -> int:
+        """
+        Publish the frozen snapshot of the config (a pinned copy is frozen if the config is not). The previous
+        generation file is removed, readers that still map it keep reading it until their next read.
+
+        :return: generation number of the published snapshot.
+        """
+        v_st: m_main.ConfigState = iv_conf.state
+        if v_st.frozen_l is None:
+            v_conf: m_main.Config = iv_conf.pin()
+            v_conf.freeze()
+            v_st = v_conf.state
+        v_generation: int = self.generation + 1
+        _file_write(_generation_path(self.path, v_generation), snapshot_encode(v_st.frozen_l, v_generation))
+        _POINTER.pack_into(self._pointer_mm, 0, _MAGIC, v_generation)
+        if self.generation:
+            try:
+                m_os.remove(_generation_path(self.path, self.generation))
+            except FileNotFoundError:
+                pass
+        self.generation = v_generation
+        return v_generation
+
+    def close(self, iv_remove: bool = True) -> None:
+        """
+        :param iv_remove: remove the pointer and the generation files, readers fail to switch to other generations.
+        """
+        self._pointer_mm.close()
+        if iv_remove:
+            for v_path in (_generation_path(self.path, self.generation), self.path):
+                try:
+                    m_os.remove(v_path)
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self) -> 'SharedPublisher':
+        return self
+
+    def __exit__(self, *il_exc) -> None:
+        self.close()
+
+
+class _Segment:
+    """
+    Mapped generation file with the values of it decoded so far.
+    """
+    __slots__ = ('generation', 'mm', 'index_l', 'value_off', 'value_l')
+
+    def __init__(self, iv_path: str, iv_generation: int):
+        with open(_generation_path(iv_path, iv_generation), 'rb') as v_file:
+            self.mm: m_mm.mmap = m_mm.mmap(v_file.fileno(), 0, access=m_mm.ACCESS_READ)
+        v_magic, v_format, self.generation, v_index_size = _HEADER.unpack_from(self.mm)
+        if v_magic != _MAGIC or v_format != gv_shared_format:
+            self.mm.close()
+            raise ValueError(f'Published config `{iv_path}` has unsupported format.')
+        self.index_l: Dict[str, Tuple[int, int]] = m_pk.loads(self.mm[_HEADER.size:_HEADER.size + v_index_size])
+        self.value_off: int = _HEADER.size + v_index_size
+        self.value_l: Dict[str, Any] = {}
+
+    def value_get(self, iv_path: str) -> Any:
+        v_ret = self.value_l.get(iv_path, _NOT_DECODED)
+        if v_ret is _NOT_DECODED:
+            v_off, v_size = self.index_l[iv_path]
+            v_off += self.value_off
+            v_ret = self.value_l[iv_path] = m_pk.loads(self.mm[v_off:v_off + v_size])
+        return v_ret
+
+
+_NOT_DECODED = object()
+
+
+class SharedConfig(Mapping[str, Any]):
+    """
+    Read-only config published by `SharedPublisher`, reads are `Config` compatible: `config[path]`, `knot`, `keys`,
+    `items`. Values are decoded on the first read and shared between reads so they must not be modified. The reader
+    switches to the new generation on the first read after it is published.
+    """
+    __slots__ = ('_root', '_path', '_pointer_mm', '_segment', '_schema', '_path_base', '_path_pref')
+
+    def __init__(
+            self, iv_name: str, iv_dir: str = None,
+            il_parser: Union['m_main.Schema', 'm_main.NodeAbc', Sequence] = None):
+        """
+        :param iv_name: name the config is published with.
+        :param iv_dir: directory of the files, `shared_dir_default()` if omitted.
+        :param il_parser: schema of the config. Paths with kind prefixes are accepted only if it is given, otherwise
+            paths must be normalized.
+        """
+        self._root: SharedConfig = self
+        self._path: str = m_os.path.join(shared_dir_default() if iv_dir is None else iv_dir, iv_name)
+        with open(self._path, 'rb') as v_file:
+            self._pointer_mm: Optional[m_mm.mmap] = m_mm.mmap(v_file.fileno(), _POINTER.size, access=m_mm.ACCESS_READ)
+        if _POINTER.unpack_from(self._pointer_mm)[0] != _MAGIC:
+            raise ValueError(f'File `{self._path}` is not a published config.')
+        self._segment: Optional[_Segment] = None
+        self._schema: Optional[m_main.Schema] = \
+            None if il_parser is None else il_parser if type(il_parser) is m_main.Schema else m_main.Schema(il_parser)
+        self._path_base: str = ''
+        self._path_pref: str = ''
+
+    @property
+    def generation(self) -> int:
+        return self._segment_actual().generation
+
+    def _segment_actual(self) -> _Segment:
+        v_root: SharedConfig = self._root
+        v_generation: int = _POINTER.unpack_from(v_root._pointer_mm)[1]
+        v_seg: Optional[_Segment] = v_root._segment
+        if v_seg is not None and v_seg.generation == v_generation:
+            return v_seg
+        while True:
+            if v_generation == 0:
+                raise LookupError(f'Nothing is published at `{v_root._path}` yet.')
+            try:
+                v_seg_new = _Segment(v_root._path, v_generation)
+                break
+            except FileNotFoundError:
+                # The generation is replaced by the next one meanwhile.
+                v_generation_next: int = _POINTER.unpack_from(v_root._pointer_mm)[1]
+                if v_generation_next == v_generation:
+                    raise
+                v_generation = v_generation_next
+        v_root._segment = v_seg_new
+        if v_seg is not None:
+            v_seg.mm.close()
+        return v_seg_new
+
+    def _path_normalize(self, iv_path: str) -> str:
+        if self._schema is None:
+            return f'{self._path_pref}{iv_path}'
+        v_step: m_main._PathStep = self._schema.path_step_l(self._path_base, iv_path)[-1]
+        if v_step.kind == 's':
+            raise TypeError('Sections can not have a value.')
+        return v_step.path
+
+    def __getitem__(self, iv_path: str) -> Any:
+        v_seg: _Segment = self._segment_actual()
+        v_path: str = f'{self._path_pref}{iv_path}'
+        if v_path not in v_seg.index_l:
+            v_path = self._path_normalize(iv_path)
+        v_ret = v_seg.value_get(v_path)
+        if type(v_ret) is m_main._ResolveError:
+            v_ret.raise_()
+        return v_ret
+
+    @property
+    def v(self) -> Any:
+        """
+        Value of the option the `knot` is taken for.
+        """
+        v_seg: _Segment = self._segment_actual()
+        if self._path_base not in v_seg.index_l:
+            raise TypeError('Sections can not have a value.')
+        v_ret = v_seg.value_get(self._path_base)
+        if type(v_ret) is m_main._ResolveError:
+            v_ret.raise_()
+        return v_ret
+
+    def __iter__(self) -> Iterator[str]:
+        v_pref_len: int = len(self._path_pref)
+        return (v[v_pref_len:] for v in self._segment_actual().index_l if v.startswith(self._path_pref))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def knot(self, iv_path: str) -> 'SharedConfig':
+        """
+        :return: view of the section (or option with children) at `iv_path`, it follows the generations as well.
+        """
+        if self._schema is None:
+            v_path: str = f'{self._path_pref}{iv_path}'
+        else:
+            v_path: str = self._schema.path_step_l(self._path_base, iv_path)[-1].path
+        v_ret: SharedConfig = SharedConfig.__new__(SharedConfig)
+        v_ret._root = self._root
+        v_ret._path = self._path
+        v_ret._pointer_mm = None
+        v_ret._segment = None
+        v_ret._schema = self._schema
+        v_ret._path_base = v_path
+        v_ret._path_pref = f'{v_path}{m_main.NODE_SEP}'
+        return v_ret
+
+    def close(self) -> None:
+        v_root: SharedConfig = self._root
+        if v_root._segment is not None:
+            v_root._segment.mm.close()
+            v_root._segment = None
+        v_root._pointer_mm.close()
@@ -0,0 +1,428 @@
+from typing import Mapping, Callable, NamedTuple, Optional, Tuple, Sequence, List, Iterable, Iterator, Any, Dict, \
+    Union
+
+import concurrent.futures as m_cf
+import hashlib as m_hl
+import json as m_json
+import logging as m_log
+import os as m_os
+import pickle as m_pk
+import tempfile as m_tf
+import threading as m_th
+import time as m_tm
+import weakref as m_wr
+
+gv_log = m_log.getLogger(__name__)
+# Max count of threads `sources_refresh` parses files with.
+gv_parse_worker_max: int = 8
+# Version of the compiled cache file layout.
+gv_cache_format: int = 1
+
+
+class FileIdent(NamedTuple):
+    """
+    Identity of the file content. File is considered changed if any of these values differs.
+    """
+    mtime_ns: int
+    size: int
+    inode: int
+
+
+def file_ident(iv_path: str) -> FileIdent:
+    v_st = m_os.stat(iv_path)
+    return FileIdent(v_st.st_mtime_ns, v_st.st_size, v_st.st_ino)
+
+
+def file_hash(iv_path: str) -> bytes:
+    with open(iv_path, mode='rb') as v_fl:
+        return m_hl.blake2b(v_fl.read(), digest_size=16).digest()
+
+
+def file_load_json(iv_path: str) -> Mapping:
+    with open(iv_path, mode='r', encoding='utf-8') as v_fl:
+        return m_json.load(v_fl)
+
+
+def file_load_yaml(iv_path: str) -> Mapping:
+    try:
+        import yaml as m_yaml
+    except ImportError as x:
+        raise ImportError(f'Package `PyYAML` is required to load `{iv_path}`.') from x
+    # libyaml based loader is several times faster, it is not available if PyYAML is built without it.
+    with open(iv_path, mode='rb') as v_fl:
+        return m_yaml.load(v_fl, Loader=getattr(m_yaml, 'CSafeLoader', m_yaml.SafeLoader))
+
+
+def file_load(iv_path: str) -> Mapping:
+    """
+    Default file loader: JSON for `.json` files and YAML for others.
+    """
+    if iv_path.lower().endswith('.json'):
+        return file_load_json(iv_path)
+    return file_load_yaml(iv_path)
+
+
+def file_parse(
+        iv_path: str, iv_loader: Callable[[str], Mapping], iv_ident: FileIdent = None
+        ) -> Optional[Tuple[FileIdent, Mapping, float]]:
+    """
+    Parse the file if its identity differs from `iv_ident`. Module level function so it can run in a process pool.
+
+    :return: identity of the file, parsed data and parse time in seconds; None if the file is not changed.
+    """
+    v_ident: FileIdent = file_ident(iv_path)
+    if v_ident == iv_ident:
+        return None
+    v_time: float = m_tm.perf_counter()
+    v_data = iv_loader(iv_path)
+    return v_ident, {} if v_data is None else v_data, m_tm.perf_counter() - v_time
+
+
+_NOT_LOADED = object()
+
+
+class LazySource(Mapping):
+    """
+    Config source loaded the first time a lookup reaches it. The provider is called once (under the lock); if it
+    fails the error is raised to the reader and the next lookup calls it again. Sources are compared by identity, so
+    `Config.reload_dicts` with a new lazy source re-resolves options under it.
+    """
+    __slots__ = ('_provider', '_key_l', '_data', '_lock')
+
+    def __init__(self, iv_provider: Callable, il_key: Iterable[str] = None):
+        """
+        :param iv_provider: zero-argument callable returning the source mapping or, if `il_key` is given, callable
+            returning the sub-tree of the top-level section by its name.
+        :param il_key: names of the top-level sections. Every section is loaded separately when it is accessed.
+        """
+        self._provider: Callable = iv_provider
+        self._key_l: Optional[dict] = None if il_key is None else dict.fromkeys(il_key)
+        self._data: Optional[dict] = None if il_key is None else {}
+        self._lock = m_th.Lock()
+
+    def _load(self) -> Mapping:
+        v_data: Optional[Mapping] = self._data
+        if v_data is None:
+            with self._lock:
+                if self._data is None:
+                    v_data = self._provider()
+                    self._data = {} if v_data is None else v_data
+                v_data = self._data
+        return v_data
+
+    def _section_load(self, iv_key: str) -> Any:
+        v_ret = self._data.get(iv_key, _NOT_LOADED)
+        if v_ret is _NOT_LOADED:
+            if iv_key not in self._key_l:
+                raise KeyError(iv_key)
+            with self._lock:
+                v_ret = self._data.get(iv_key, _NOT_LOADED)
+                if v_ret is _NOT_LOADED:
+                    v_ret = self._provider(iv_key)
+                    self._data[iv_key] = v_ret
+        return v_ret
+
+    def is_loaded(self, iv_key: str = None) -> bool:
+        """
+        :param iv_key: name of the top-level section for the per-section source.
+        """
+        if self._key_l is None:
+            return self._data is not None
+        return iv_key in self._data
+
+    def __getitem__(self, iv_key: str) -> Any:
+        if self._key_l is None:
+            return self._load()[iv_key]
+        return self._section_load(iv_key)
+
+    def __contains__(self, iv_key) -> bool:
+        if self._key_l is None:
+            return iv_key in self._load()
+        return iv_key in self._key_l
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load() if self._key_l is None else self._key_l)
+
+    def __len__(self) -> int:
+        return len(self._load() if self._key_l is None else self._key_l)
+
+    def __eq__(self, iv) -> bool:
+        return self is iv
+
+    __hash__ = object.__hash__
+
+
+class FlatSource(Mapping):
+    """
+    Config source of path-keyed values, like `{'main/packet_size': '2KB'}`, for overrides from the command line or
+    environment. It is not expanded into nested dicts: it behaves as the nested tree of its paths and every node
+    lookup is a hash lookup of the node path. Node objects are shared by all lookups, so a walk to a deep option
+    allocates nothing after the first one. Option with children may have both the value and the child paths.
+
+    Paths may contain `s_`, `v_` and `l_` prefixes, `Config.load_dicts` normalizes them against the schema (unknown
+    paths raise `KeyError`). Sources are compared by the values, so reloading the same overrides changes nothing.
+    """
+    __slots__ = ('_value_l', '_child_l', '_node_l', '_path', 'normalized')
+
+    def __init__(
+            self, il_value: Union[Mapping[str, Any], Iterable[Tuple[str, Any]]], iv_sep: str = '/',
+            iv_normalized: bool = False):
+        """
+        :param il_value: option path -> raw value, or the iterable of such pairs. Latter pairs override former.
+        :param iv_sep: separator of the path segments, paths are kept with the schema separator '/'.
+        :param iv_normalized: paths are normalized schema paths already.
+        """
+        self._value_l: Dict[str, Any] = dict(il_value)
+        if iv_sep != '/':
+            self._value_l = {v_path.replace(iv_sep, '/'): v for v_path, v in self._value_l.items()}
+        # Node path -> names of its children, '' is the root.
+        l_child: Dict[str, dict] = {}
+        for v_path in self._value_l:
+            l_name: List[str] = v_path.split('/')
+            v_pref: str = ''
+            for v_name in l_name:
+                l_child.setdefault(v_pref, {})[v_name] = None
+                v_pref = f'{v_pref}/{v_name}' if v_pref else v_name
+        self._child_l: Dict[str, dict] = l_child
+        # Node path -> node, shared by the nodes of the source.
+        self._node_l: Dict[str, FlatSource] = {}
+        self._path: str = ''
+        self.normalized: bool = iv_normalized
+
+    @classmethod
+    def from_text(cls, il_line: Iterable[str], iv_sep: str = '/') -> 'FlatSource':
+        """
+        :param il_line: `path=value` strings, like command line arguments.
+        """
+        l_pair: list = []
+        for v_line in il_line:
+            v_path, v_eq, v_value = v_line.partition('=')
+            if not v_eq:
+                raise ValueError(f'Override `{v_line}` is not a `path=value` pair.')
+            l_pair.append((v_path.strip(), v_value))
+        return cls(l_pair, iv_sep)
+
+    def normalize(self, iv_path_normalize: Callable[[str], str]) -> 'FlatSource':
+        """
+        :param iv_path_normalize: callable returning the normalized path of the raw one.
+        :return: source with normalized paths, this source if the paths are normalized already.
+        """
+        if self.normalized:
+            return self
+        return FlatSource(
+            ((iv_path_normalize(v_path), v) for v_path, v in self._value_l.items()), '/', True)
+
+    def _node(self, iv_path: str) -> 'FlatSource':
+        v_ret: Optional[FlatSource] = self._node_l.get(iv_path)
+        if v_ret is None:
+            v_ret = FlatSource.__new__(FlatSource)
+            v_ret._value_l = self._value_l
+            v_ret._child_l = self._child_l
+            v_ret._node_l = self._node_l
+            v_ret._path = iv_path
+            v_ret.normalized = self.normalized
+            self._node_l[iv_path] = v_ret
+        return v_ret
+
+    def __getitem__(self, iv_key: str) -> Any:
+        if iv_key == 'v' and self._path:
+            return self._value_l[self._path]
+        v_path: str = f'{self._path}/{iv_key}' if self._path else iv_key
+        if v_path in self._child_l:
+            return self._node(v_path)
+        return self._value_l[v_path]
+
+    def __contains__(self, iv_key) -> bool:
+        if iv_key == 'v' and self._path:
+            return self._path in self._value_l
+        return iv_key in self._child_l.get(self._path, ())
+
+    def __iter__(self) -> Iterator[str]:
+        if self._path and self._path in self._value_l:
+            yield 'v'
+        yield from self._child_l.get(self._path, ())
+
+    def __len__(self) -> int:
+        return len(self._child_l.get(self._path, ())) + (bool(self._path) and self._path in self._value_l)
+
+    def __repr__(self) -> str:
+        return f'FlatSource({self._path!r}, {len(self._value_l)} values)'
+
+
+class FileSource:
+    """
+    Config source backed by a file. Keeps parsed data with the identity of the file it was parsed from.
+    """
+    __slots__ = ('path', 'loader', 'ident', 'data', 'parse_time')
+
+    def __init__(self, iv_path: str, iv_loader: Callable[[str], Mapping] = None):
+        self.path: str = iv_path
+        self.loader: Callable[[str], Mapping] = file_load if iv_loader is None else iv_loader
+        self.ident: Optional[FileIdent] = None
+        self.data: Mapping = {}
+        # Seconds spent on the last parse of the file.
+        self.parse_time: float = 0.0
+
+    def refresh(self) -> bool:
+        """
+        Parse the file again if its identity is changed. Data and identity are updated only if parsing succeeds.
+
+        :return: True if data is updated.
+        """
+        return self.apply(file_parse(self.path, self.loader, self.ident))
+
+    def apply(self, iv_result: Optional[Tuple[FileIdent, Mapping, float]]) -> bool:
+        """
+        :param iv_result: result of `file_parse` for this source.
+        :return: True if data is updated.
+        """
+        if iv_result is None:
+            return False
+        self.ident, self.data, self.parse_time = iv_result
+        return True
+
+
+def sources_refresh(il_source: Sequence[FileSource], iv_executor: m_cf.Executor = None) -> List[bool]:
+    """
+    Refresh file sources concurrently. Sources are updated only if all changed files are parsed successfully.
+
+    :param iv_executor: executor to parse files in. Pass `ProcessPoolExecutor` for big files (loaders must be
+        picklable), by default a thread pool is used for more than one file.
+    :return: `FileSource.refresh` results in the order of `il_source`.
+    """
+    if iv_executor is None:
+        if len(il_source) < 2:
+            return [v.refresh() for v in il_source]
+        with m_cf.ThreadPoolExecutor(min(len(il_source), gv_parse_worker_max), 'conflex-parse') as v_exec:
+            return sources_refresh(il_source, v_exec)
+    l_future: list = [iv_executor.submit(file_parse, v.path, v.loader, v.ident) for v in il_source]
+    l_result: list = [v.result() for v in l_future]
+    l_ret: List[bool] = [v_src.apply(v_res) for v_src, v_res in zip(il_source, l_result)]
+    for v_src, v_upd in zip(il_source, l_ret):
+        if v_upd:
+            gv_log.debug('Config file `%s` parsed in %.6f s.', v_src.path, v_src.parse_time)
+    return l_ret
+
+
+class FileWatcher(m_th.Thread):
+    """
+    Daemon thread polling files of the config. It holds weak reference to the config and stops when the config is
+    garbage collected.
+    """
+    def __init__(self, iv_conf, iv_interval: float):
+        super().__init__(name='conflex-file-watcher', daemon=True)
+        self._conf_ref = m_wr.ref(iv_conf)
+        self._interval: float = iv_interval
+        self._stop_event = m_th.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            v_conf = self._conf_ref()
+            if v_conf is None:
+                break
+            try:
+                v_conf.files_refresh()
+            except Exception:
+                # File can be partially written, it is parsed again on the next poll.
+                gv_log.exception('Config files refresh failed.')
+            del v_conf
+
+    def stop(self, iv_timeout: float = None) -> None:
+        self._stop_event.set()
+        if self.is_alive() and m_th.current_thread() is not self:
+            self.join(iv_timeout)
+
+
+def loader_id(iv_loader: Optional[Callable[[str], Mapping]]) -> str:
+    v_loader = file_load if iv_loader is None else iv_loader
+    return f'{getattr(v_loader, "__module__", "")}.{getattr(v_loader, "__qualname__", repr(v_loader))}'
+
+
+class _CachePickler(m_pk.Pickler):
+    """
+    Pickler keeping read-only array values of list options read-only.
+    """
+    def reducer_override(self, iv):
+        if type(iv) is memoryview:
+            return _memoryview_restore, (iv.obj,)
+        if type(iv).__module__ == 'numpy' and type(iv).__name__ == 'ndarray' and not iv.flags.writeable:
+            return _ndarray_restore, (iv.tobytes(), iv.dtype.str, iv.shape)
+        return NotImplemented
+
+
+def _memoryview_restore(iv_obj) -> memoryview:
+    return memoryview(iv_obj).toreadonly()
+
+
+def _ndarray_restore(iv_data: bytes, iv_dtype: str, iv_shape: tuple):
+    import numpy as m_np
+    return m_np.frombuffer(iv_data, dtype=iv_dtype).reshape(iv_shape)
+
+
+def cache_read(iv_cache_path: str, iv_key: tuple, il_source: Sequence[FileSource]) -> Optional[dict]:
+    """
+    Read the compiled config cache. Cache is valid if its key is the same and every file has the same mtime and size
+    or, if they are changed, the same content hash. Cache file is unpickled so it must be writable by trusted users
+    only.
+
+    :param iv_key: schema fingerprint and other values the cached config depends on.
+    :param il_source: sources of the files in the order of loading. On hit their data and identity are set from the
+        cache.
+    :return: cache content or None on miss.
+    """
+    try:
+        with open(iv_cache_path, mode='rb') as v_fl:
+            l_cache = m_pk.load(v_fl)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        gv_log.warning('Config cache `%s` is not readable.', iv_cache_path, exc_info=True)
+        return None
+    if type(l_cache) is not dict or l_cache.get('key') != (gv_cache_format, iv_key):
+        return None
+    l_file: list = l_cache['file_l']
+    if len(l_file) != len(il_source) or any(v_f[0] != v_s.path for v_f, v_s in zip(l_file, il_source)):
+        return None
+    l_ident: List[FileIdent] = []
+    try:
+        for v_path, v_ident, v_hash in l_file:
+            v_ident_curr: FileIdent = file_ident(v_path)
+            if v_ident_curr != v_ident and file_hash(v_path) != v_hash:
+                return None
+            l_ident.append(v_ident_curr)
+    except OSError:
+        return None
+    for v_source, v_ident, v_data in zip(il_source, l_ident, l_cache['data_l']):
+        v_source.ident = v_ident
+        v_source.data = v_data
+        v_source.parse_time = 0.0
+    return l_cache
+
+
+def cache_write(iv_cache_path: str, iv_key: tuple, il_source: Sequence[FileSource], **il_value) -> bool:
+    """
+    Write the compiled config cache atomically: to the temporary file in the same directory replacing the cache file
+    after that.
+
+    :param iv_key: schema fingerprint and other values the cached config depends on.
+    :param il_source: refreshed sources of the files.
+    :param il_value: other values to keep in the cache.
+    :return: False if some file is changed since it was parsed, the cache is not written then.
+    """
+    l_file: list = []
+    for v_source in il_source:
+        v_hash: bytes = file_hash(v_source.path)
+        if file_ident(v_source.path) != v_source.ident:
+            return False
+        l_file.append((v_source.path, v_source.ident, v_hash))
+    l_cache: dict = {'key': (gv_cache_format, iv_key), 'file_l': l_file, 'data_l': [v.data for v in il_source]}
+    l_cache.update(il_value)
+    v_fd, v_path_tmp = m_tf.mkstemp(prefix='.conflex-', dir=m_os.path.dirname(m_os.path.abspath(iv_cache_path)))
+    try:
+        with m_os.fdopen(v_fd, mode='wb') as v_fl:
+            _CachePickler(v_fl, m_pk.HIGHEST_PROTOCOL).dump(l_cache)
+        m_os.replace(v_path_tmp, iv_cache_path)
+    except BaseException:
+        m_os.unlink(v_path_tmp)
+        raise
+    return True
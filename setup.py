@@ -16,7 +16,7 @@ setup(
     description='Flexible and extensible configuration reader for python.',
     long_description=v_long_description,
     long_description_content_type='text/markdown',
-    python_requires='>=3.6.0',
+    python_requires='>=3.8.0',
     extras_require={
         'testing': [
             'pytest >= 5.3.5',
@@ -33,9 +33,6 @@ setup(
         'License :: OSI Approved :: MIT License',
 
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
 
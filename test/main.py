@@ -1,3 +1,4 @@
+import array as m_arr
 import pytest
 import conflex as m_c
 
@@ -134,6 +135,112 @@ def test_config_values(fv_conf_object):
     assert fv_conf_object['main/complex/kind'] == 'nice'
 
 
+def test_config_get_many(fv_conf_object, fv_conf_dict):
+    l_path: list = [
+        'main/lost', 'main/lost/sub_lost', 's_main/l_lost_list', 'main/bool', 'main/int', 'main/int', 'main/float',
+        'main/complex_list', 'main/complex_list/as', 'main/complex', 'main/complex/kind', 'main/empty_list']
+    l_expect: list = [fv_conf_object[v] for v in l_path]
+    v_conf = m_c.Config(fv_conf_object._schema)
+    v_conf.load_dicts(fv_conf_dict)
+    assert v_conf.get_many(l_path) == l_expect
+    assert v_conf.cache_info()[:2] == (0, 11)
+    l_ret = v_conf.get_many(l_path)
+    assert l_ret == l_expect
+    assert v_conf.cache_info()[:2] == (12, 11)
+    l_ret[2].append('x')
+    assert v_conf['main/lost_list'] == list('default')
+    v_conf.freeze()
+    assert v_conf.get_many(l_path) == l_expect
+    v_sconf = fv_conf_object.knot('main/complex')
+    assert v_sconf.get_many(['v_kind', 'kind']) == ['nice', 'nice']
+    v_conf = m_c.Config(['main' >> m_c.Section() << ['v_name', 'v_host', 'port' >> m_c.OptVInt()]])
+    v_conf.load_dicts([{'main': {'name': 'a', 'port': 'x'}}])
+    with pytest.raises(KeyError, match='main/host'):
+        v_conf.get_many(['main/name', 'main/host', 'main/v_port'])
+    with pytest.raises(ValueError):
+        v_conf.get_many(['main/name', 'main/v_port', 'main/host'])
+    with pytest.raises(KeyError):
+        v_conf.get_many(['main/name', 'main/none'])
+    with pytest.raises(TypeError):
+        v_conf.get_many(['main'])
+
+
+def test_config_bind(fv_conf_object):
+    import dataclasses
+    from typing import Tuple
+
+    @dataclasses.dataclass(frozen=True)
+    class Complex:
+        v: str
+        kind: str
+
+    @dataclasses.dataclass(frozen=True)
+    class ComplexItem:
+        v: int
+        as_: str = dataclasses.field(metadata={'path': 'as'})
+
+    @dataclasses.dataclass
+    class Main:
+        int: int
+        int_list: Tuple[int, ...]
+        lost_list: list
+        complex: Complex
+        complex_list: Tuple[ComplexItem, ...]
+
+    @dataclasses.dataclass
+    class Root:
+        main: Main
+
+    v_root = fv_conf_object.bind(Root)
+    assert v_root.main.int == 42
+    assert v_root.main.int_list == (1, 2, 3)
+    assert v_root.main.lost_list == list('default')
+    assert v_root.main.complex == Complex('ok', 'nice')
+    assert v_root.main.complex_list == tuple(
+        ComplexItem(v.v, v['as']) for v in fv_conf_object.slice('main/complex_list'))
+    assert v_root.main.complex_list[:2] == (ComplexItem(1, 'I'), ComplexItem(5, 'V'))
+    assert fv_conf_object.knot('main/complex').bind(Complex) == Complex('ok', 'nice')
+    assert fv_conf_object._schema.bind_plan(Root) is fv_conf_object._schema.bind_plan(Root)
+
+    @dataclasses.dataclass
+    class Bad:
+        none: int
+
+    @dataclasses.dataclass
+    class BadSection:
+        main: int
+
+    with pytest.raises(KeyError):
+        fv_conf_object.bind(Bad)
+    with pytest.raises(TypeError):
+        fv_conf_object.bind(BadSection)
+    with pytest.raises(TypeError):
+        fv_conf_object.bind(dict)
+
+
+@pytest.mark.parametrize('iv_frozen', [False, True])
+def test_config_codegen(fv_conf_object, fv_conf_dict, iv_frozen):
+    v_schema = m_c.Schema(fv_conf_object._parser_l, iv_codegen=True)
+    l_source: list = list(fv_conf_dict) + [
+        {'main': {'int': {'v': '2K'}, 'lost_list': [], 'float': {'v': '2.5'}}}, {'main': {'v_bigint': 7, 'l_int_list': 9}}]
+    for l_src in (fv_conf_dict, l_source):
+        v_conf, v_conf_cg = m_c.Config(fv_conf_object._schema), m_c.Config(v_schema)
+        v_conf.load_dicts(l_src, iv_frozen=iv_frozen)
+        v_conf_cg.load_dicts(l_src, iv_frozen=iv_frozen)
+        assert list(v_conf_cg.items()) == list(v_conf.items())
+        for v_path in list(v_conf.keys()) + ['s_main/v_int', 'main/l_int_list']:
+            assert v_conf_cg[v_path] == v_conf[v_path]
+        assert v_conf_cg.knot('main/complex')['kind'] == v_conf.knot('main/complex')['kind']
+    assert v_schema.resolver('', v_conf_cg._path_step_l('', 'main/int')) is not None
+    assert v_schema.resolver('', v_conf_cg._path_step_l('', 'main/complex_list/as')) is None
+    v_conf_cg = m_c.Config(v_schema)
+    v_conf_cg.load_dicts([{'main': {'int': 'x'}}], iv_frozen=iv_frozen)
+    with pytest.raises(ValueError):
+        v_conf_cg['main/int']
+    with pytest.raises(KeyError):
+        v_conf_cg['main/float']
+
+
 def test_subconfig_values(fv_conf_object):
     v_sconf_object = fv_conf_object.knot('main/complex')
     assert v_sconf_object.v == 'ok'
@@ -496,3 +603,726 @@ def test_conf_errors():
                 'v_twin'
             ]
         ])
+
+
+def test_config_frozen(fv_conf_dict):
+    v_conf = m_c.Config([
+        'main' >> m_c.Section() << [
+            'lost' >> m_c.OptValue(iv_default='default'),
+            'int' >> m_c.OptVInt(),
+            'bigint' >> m_c.OptVInt(),
+            'required' >> m_c.OptValue(),
+            'complex_list' >> m_c.OptLInt() << [
+                'as' >> m_c.OptValue(iv_default='?')],
+            'complex' >> m_c.OptValue() << [
+                'kind' >> m_c.OptValue()]]])
+    v_conf.load_dicts(fv_conf_dict, iv_frozen=True)
+    assert v_conf.frozen
+    assert v_conf['main/lost'] == 'default'
+    assert v_conf['s_main/v_int'] == 42
+    assert v_conf['main/bigint'] == 2 * 1024
+    assert v_conf['main/complex_list/as'] == ['I', 'V', 'X', '?']
+    with pytest.raises(KeyError):
+        v = v_conf['main/required']
+    with pytest.raises(KeyError):
+        v = v_conf['main/required']
+    with pytest.raises(TypeError):
+        v = v_conf['main']
+    with pytest.raises(KeyError):
+        v = v_conf['main/dummy']
+    v_sc = v_conf.knot('s_main/v_complex')
+    assert v_sc is not v_conf.knot('s_main/v_complex')
+    assert v_sc.v == 'ok'
+    assert v_sc['v_kind'] == 'nice'
+    v_sc.load_dicts([{'main': {'complex': {'v': 'ok', 'kind': 'hijack'}}}])
+    assert v_sc['v_kind'] == 'hijack'
+    assert v_conf.knot('s_main/v_complex')['v_kind'] == 'nice'
+    with pytest.raises(TypeError):
+        v = v_conf.knot('main').v
+    assert ('main/int', 42) in v_conf.items()
+    assert ('main/lost', 'default') not in v_conf.items()
+    v_conf.load_dicts(fv_conf_dict)
+    assert not v_conf.frozen
+    assert v_conf['main/int'] == 42
+
+
+def test_config_cache(fv_conf_dict):
+    v_conf = m_c.Config([
+        'main' >> m_c.Section() << [
+            'int' >> m_c.OptVInt(),
+            'int_list' >> m_c.OptLInt(),
+            'complex' >> m_c.OptValue() << [
+                'kind' >> m_c.OptValue()]]])
+    v_conf.load_dicts(fv_conf_dict)
+    assert v_conf.cache_info() == (0, 0, 0)
+    assert v_conf['main/int'] == 42
+    assert v_conf['main/int'] == 42
+    assert v_conf['s_main/v_int'] == 42
+    assert v_conf.cache_info() == (2, 1, 1)
+    v_list = v_conf['main/int_list']
+    v_list.append(4)
+    assert v_conf['main/int_list'] == [1, 2, 3]
+    assert v_conf.knot('main/complex')['kind'] == 'nice'
+    assert v_conf['main/complex/kind'] == 'nice'
+    assert v_conf.cache_info() == (4, 2, 3)
+    v_conf.load_dicts([{'main': {'int': 24}}])
+    assert v_conf.cache_info().currsize == 0
+    assert v_conf['main/int'] == 24
+    v_conf.cache_clear()
+    assert v_conf.cache_info() == (0, 0, 0)
+
+
+def test_config_views(fv_conf_object):
+    l_item = list(fv_conf_object.items())
+    assert [v for v, _ in l_item] == list(fv_conf_object.keys())
+    assert [v for _, v in l_item] == list(fv_conf_object.values())
+    assert len(fv_conf_object.keys()) == len(l_item)
+    assert 'main/complex/kind' in fv_conf_object.keys()
+    assert 'main' not in fv_conf_object.keys()
+    v_sconf_object = fv_conf_object.knot('s_main/v_complex')
+    assert dict(v_sconf_object.items()) == {'kind': 'nice'}
+    assert ('kind', 'nice') in v_sconf_object.items()
+    v_sconf_object = fv_conf_object.knot('main/lost')
+    assert dict(v_sconf_object.items()) == {'sub_lost': 'sub_default'}
+    v_sconf_object.freeze()
+    assert dict(v_sconf_object.items()) == {'sub_lost': 'sub_default'}
+    assert v_sconf_object.v == 'default'
+
+
+@pytest.mark.parametrize('iv_frozen', [False, True])
+def test_opt_list_storage(tmp_path, iv_frozen):
+    import json
+    with pytest.raises(ValueError):
+        m_c.OptList(iv_storage='array')
+    with pytest.raises(ValueError):
+        m_c.OptLInt(iv_storage='tuple')
+    v_schema = m_c.Schema(['main' >> m_c.Section() << [
+        'bucket' >> m_c.OptLInt(iv_storage='array'),
+        'weight' >> m_c.OptLFloat(iv_default=[0.5], iv_storage='array'),
+        'big' >> m_c.OptLInt(iv_required=False, iv_storage='array')]])
+    v_fl = tmp_path / 'conf.json'
+    v_fl.write_text(json.dumps({'main': {'bucket': [1, '2K', '1KB'], 'big': [2 ** 70]}}))
+    v_conf = m_c.Config(v_schema)
+    v_conf.load_files([str(v_fl)], iv_frozen=iv_frozen, iv_cache_path=str(tmp_path / 'conf.cache'))
+    v_bucket = v_conf['main/bucket']
+    assert type(v_bucket) is memoryview and v_bucket.readonly and v_bucket.format == 'q'
+    assert v_bucket.tolist() == [1, 2000, 1024]
+    with pytest.raises(TypeError):
+        v_bucket[0] = 5
+    assert v_conf['main/weight'].tolist() == [0.5]
+    assert v_conf['main/bucket'] is v_bucket
+    with pytest.raises(ValueError):
+        v_conf['main/big']
+    assert [v.v for v in v_conf.slice('main/bucket')] == [1, 2000, 1024]
+    v_conf = m_c.Config(v_schema)
+    v_conf.load_files([str(v_fl)], iv_frozen=iv_frozen, iv_cache_path=str(tmp_path / 'conf.cache'))
+    assert v_conf['main/bucket'].readonly and v_conf['main/bucket'].tolist() == [1, 2000, 1024]
+    assert v_conf.reload_dicts([{'main': {'bucket': [1, 2000, 1024], 'weight': 1}}]) == {'main/weight', 'main/big'}
+    assert v_conf['main/weight'].tolist() == [1.0]
+
+    class OptLPort(m_c.OptLInt):
+        def value_parse(self, iv: str) -> int:
+            v = super().value_parse(iv)
+            if v > 65535:
+                raise ValueError(f'Port is out of range: {v}')
+            return v
+
+    v_conf = m_c.Config(['l_port' >> OptLPort(iv_storage='array')])
+    v_conf.load_dicts([{'port': [80, 70000]}])
+    with pytest.raises(ValueError):
+        v_conf['port']
+    v_conf.load_dicts([{'port': [80, '1K']}])
+    assert v_conf['port'].tolist() == [80, 1000]
+
+
+def test_schema():
+    l_tree: list = [
+        'main' >> m_c.Section() << ['v_name', 'port' >> m_c.OptVInt(iv_default=1)],
+        'l_host']
+    v_schema = m_c.Schema(l_tree)
+    assert set(v_schema) == {'host', 'main', 'main/name', 'main/port'}
+    assert v_schema.child_l['main'] == ['name', 'port']
+    assert v_schema.opt_path_l('main') == {'name': 'main/name', 'port': 'main/port'}
+    assert m_c.Schema(l_tree).fingerprint == v_schema.fingerprint
+    assert m_c.Config(l_tree)._parser_l.keys() == v_schema.keys()
+
+    class Limit:
+        def __init__(self, iv_max: int):
+            self.max = iv_max
+
+    class OptChecked(m_c.OptVInt):
+        def __init__(self, iv_check, iv_limit: Limit):
+            super().__init__()
+            self.check = iv_check
+            self.limit = iv_limit
+
+    def fingerprint(iv_check, iv_max: int) -> str:
+        # New objects on every call, their default reprs differ by the address.
+        return m_c.Schema(['port' >> OptChecked(iv_check, Limit(iv_max))]).fingerprint
+
+    assert fingerprint(abs, 1) == fingerprint(abs, 1) != fingerprint(abs, 2) != fingerprint(round, 2)
+    assert fingerprint(fingerprint, 1) == fingerprint(fingerprint, 1)
+    l_conf: list = [m_c.Config(v_schema) for _ in range(3)]
+    for v_idx, v_conf in enumerate(l_conf):
+        v_conf.load_dicts([{'main': {'name': f'n{v_idx}'}, 'host': [v_idx]}])
+    assert [(v['main/name'], v['main/port'], v['host']) for v in l_conf] == [
+        ('n0', 1, [0]), ('n1', 1, [1]), ('n2', 1, [2])]
+    v_knot = l_conf[0].knot('main')
+    assert v_knot._schema is v_schema and v_knot._path_step_l is l_conf[1]._path_step_l
+    assert dict(v_knot.items()) == {'name': 'n0', 'port': 1}
+
+
+def test_path_compile(fv_conf_object):
+    l_step = m_c.main._path_compile(fv_conf_object._parser_l, '', 's_main/l_complex_list/as')
+    assert [(v.kind, v.key, v.path, v.path_raw) for v in l_step] == [
+        ('s', 'main', 'main', 's_main'),
+        ('l', 'complex_list', 'main/complex_list', 'main/l_complex_list'),
+        ('v', 'as', 'main/complex_list/as', 'main/complex_list/as')]
+    with pytest.raises(KeyError):
+        m_c.main._path_compile(fv_conf_object._parser_l, 'main', 'v_int_list')
+    with pytest.raises(KeyError):
+        m_c.main._path_compile(fv_conf_object._parser_l, '', 'main//int')
+    v_conf = m_c.Config(['main' >> m_c.Section() << ['int' >> m_c.OptVInt()]])
+    v_conf.load_dicts([{'main': {'int': 1}}])
+    for _ in range(3):
+        assert v_conf.knot('main')['v_int'] == 1
+    assert v_conf._path_step_l.cache_info().hits > 0
+
+
+def test_walker_cursor():
+    l_parser = {'s': m_c.Section(), 's/a': m_c.OptValue(iv_default='a'), 's/l': m_c.OptList(iv_default='l')}
+    v_wl = m_c.main.ConfTreeWalker([{'s': {'a': 1}}])
+    v_wl_s = v_wl.move(l_parser, 's')
+    assert v_wl.path == '' and v_wl_s.path == 's'
+    assert v_wl_s.move(l_parser, 'v_a').value_get(l_parser) == 1
+    v_step = m_c.main._path_compile(l_parser, 's', 'l')[-1]
+    assert v_wl_s.step(v_step) is v_wl_s.step(v_step) is v_step.missing_l[1]
+    assert v_wl_s.step(v_step).value_get(l_parser) == ['l']
+    assert not v_wl_s.step(v_step).node_exist()
+
+
+@pytest.mark.parametrize('iv_frozen', [False, True])
+def test_walker_cursor_list_missing(iv_frozen):
+    v_conf = m_c.Config(['main' >> m_c.Section() << [
+        'l_item' >> m_c.OptList() << ['as' >> m_c.OptValue(iv_default='?')],
+        's_sect' >> m_c.Section() << ['name' >> m_c.OptValue(iv_default='n')]]])
+    v_conf.load_dicts([{'main': {
+        'item': [{'v': 1}, {'v': 2, 'as': 'x'}, {'v': 3}], 'sect': [{}, {'name': 'a'}, {}]}}], iv_frozen)
+    assert v_conf['main/item/as'] == ['?', 'x', '?']
+    v_conf.load_dicts([{'main': {'item': [{'v': 1}, {'v': 2}, {'v': 3}], 'sect': [{}, {}]}}], iv_frozen)
+    assert v_conf['main/item/as'] == ['?', '?', '?']
+    assert dict(v_conf.items())['main/item/as'] == ['?', '?', '?']
+    assert [v['as'] for v in v_conf.slice('main/item')] == ['?', '?', '?']
+    assert v_conf['main/sect/name'] == 'n'
+
+
+@pytest.mark.parametrize('iv_frozen', [False, True])
+def test_config_reload(iv_frozen):
+    v_conf = m_c.Config([
+        'main' >> m_c.Section() << [
+            'int' >> m_c.OptVInt(iv_default='1K'),
+            'list' >> m_c.OptList(iv_required=False),
+            'sub' >> m_c.Section() << ['v_name', 'v_port']],
+        'other' >> m_c.Section() << ['v_name']])
+    l_other: dict = {'name': 'other'}
+    v_conf.load_dicts([{'main': {'int': 1, 'sub': {'name': 'a', 'port': 1}}, 'other': l_other}], iv_frozen=iv_frozen)
+    assert v_conf['main/sub/name'] == 'a'
+    l_notify: list = []
+    v_conf.subscribe('main/sub', l_notify.append)
+    v_conf.subscribe('s_other', l_notify.append)
+    l_changed = v_conf.reload_dicts(
+        [{'main': {'int': 1, 'sub': {'name': 'b', 'port': 1}}, 'other': l_other}, {'main': {'list': []}}])
+    assert l_changed == {'main/sub/name'}
+    assert l_notify == [{'main/sub/name'}]
+    assert v_conf.frozen == iv_frozen
+    assert v_conf['main/sub/name'] == 'b'
+    assert v_conf['main/int'] == 1
+    l_changed = v_conf.reload_dicts([{'main': {'sub': {'name': 'b', 'port': 1}}, 'other': {'name': 'x'}}])
+    assert l_changed == {'main/int', 'other/name'}
+    assert l_notify == [{'main/sub/name'}, {'other/name'}]
+    assert v_conf['main/int'] == 1000
+    v_conf.unsubscribe('other', l_notify.append)
+    v_sconf = v_conf.knot('main/sub')
+    assert v_sconf.reload_dicts([{'main': {'sub': {'name': 'c', 'port': 1}}}]) == {'main/sub/name'}
+    assert v_sconf['name'] == 'c'
+    assert v_conf['main/sub/name'] == 'b'
+
+
+@pytest.mark.parametrize('iv_frozen', [False, True])
+def test_config_version(iv_frozen):
+    import asyncio
+    v_conf = m_c.Config([
+        'main' >> m_c.Section() << ['v_name', 'l_port' >> m_c.OptLInt()]])
+    v_conf.load_dicts([{'main': {'name': 'a', 'port': [1, 2]}}], iv_frozen=iv_frozen)
+    v_version = v_conf.version
+    v_knot = v_conf.knot('main')
+    v_pinned = v_conf.knot('main').pin()
+    l_slice = list(v_conf.slice('main/port'))
+    assert v_knot['name'] == 'a' and v_pinned['name'] == 'a'
+    v_conf.reload_dicts([{'main': {'name': 'b', 'port': [3, 2]}}])
+    assert v_conf.version == v_version + 1
+    assert v_knot['name'] == 'b'
+    assert v_knot.version == v_conf.version
+    assert v_pinned['name'] == 'a'
+    assert l_slice[0].v == 3
+
+    async def source_get():
+        return [{'main': {'name': 'c', 'port': [4]}}]
+    assert asyncio.run(v_conf.reload_async(source_get)) == {'main/name', 'main/port'}
+    assert asyncio.run(v_conf.reload_async(lambda: [{'main': {'name': 'd', 'port': [4]}}])) == {'main/name'}
+    assert v_conf.version == v_version + 3
+    assert v_conf.frozen == iv_frozen
+    assert v_knot['name'] == 'd'
+    assert v_pinned['name'] == 'a'
+    assert [v.v for v in v_pinned.slice('port')] == [1, 2]
+    assert l_slice[0].v == 4
+    with pytest.raises(IndexError):
+        l_slice[1].v
+    v_st = v_knot._reload_prepare(v_knot.state, [{'main': {'name': 'e'}}])[0]
+    assert v_knot._origin is v_conf and v_knot.state is not v_st and v_knot['name'] == 'd'
+    assert asyncio.run(v_knot.reload_async(lambda: [{'main': {'name': 'e'}}])) == {'main/name', 'main/port'}
+    assert v_knot._origin is None and v_knot['name'] == 'e' and v_conf['main/name'] == 'd'
+
+
+def test_config_slice_view():
+    v_conf = m_c.Config(['l_route' >> m_c.OptList() << ['v_host', 'port' >> m_c.OptVInt(iv_default=80)]])
+    l_route: list = [{'host': f'h{v}', 'port': v} for v in range(10000)]
+    v_conf.load_dicts([{'route': l_route}, {'route': [{'host': 'over'}]}])
+    v_view = v_conf.slice('route')
+    assert isinstance(v_view, m_c.SliceView)
+    assert len(v_view) == 10000
+    assert v_view[0]['host'] == 'over' and v_view[0]['port'] == 80
+    assert v_view[5000]['host'] == 'h5000' and v_view[5000]['port'] == 5000
+    assert v_view[-1]['host'] == 'h9999'
+    assert [v['host'] for v in v_view[1:4]] == ['h1', 'h2', 'h3']
+    assert [v['port'] for v in v_view[-3::2]] == [9997, 9999]
+    with pytest.raises(IndexError):
+        v_view[10000]
+    assert [v['host'] for v in v_view][:2] == ['over', 'h1']
+    v_item = v_view[7]
+    v_conf.load_dicts([{'route': [{'host': f'n{v}'} for v in range(10)]}])
+    assert v_item['host'] == 'n7'
+    assert len(v_view) == 10000 and len(v_conf.slice('route')) == 10
+    v_view = v_conf.slice('route')
+    assert next(v_view)['host'] == 'n0' and next(v_view)['host'] == 'n1'
+    assert len(list(v_view)) == 10 and next(v_view)['host'] == 'n2'
+    assert [v['host'] for v in iter(v_view.__next__, None)] == [f'n{v}' for v in range(3, 10)]
+    with pytest.raises(StopIteration):
+        next(v_view)
+
+
+def test_config_columns(fv_conf_object):
+    l_col: dict = fv_conf_object.columns('main/complex_list', ['v', 'as'])
+    l_item: list = [(v.v, v['as']) for v in fv_conf_object.slice('main/complex_list')]
+    assert list(zip(l_col['v'], l_col['as'])) == l_item
+    assert isinstance(l_col['v'], m_arr.array) and l_col['v'].typecode == 'q'
+    assert isinstance(l_col['as'], list)
+
+    v_conf = m_c.Config([
+        'l_route' >> m_c.OptList() << [
+            'v_host', 'port' >> m_c.OptVInt(iv_default=80), 'v_weight' >> m_c.OptVFloat(iv_default=1.0),
+            'l_tag' >> m_c.OptList()]])
+    v_conf.load_dicts([{'route': [{'host': f'h{v % 3}', 'port': v, 'weight': '0.5'} for v in range(100)]},
+                       {'route': [{'host': 'over'}]}])
+    l_col = v_conf.columns('route', ['host', 'v_port', 'weight'])
+    assert l_col['host'][:4] == ['over', 'h1', 'h2', 'h0']
+    assert l_col['host'][4] is l_col['host'][1]
+    assert l_col['v_port'][0] == 80 and l_col['v_port'][99] == 99
+    assert l_col['weight'].typecode == 'd' and l_col['weight'][0] == 1.0 and l_col['weight'][1] == 0.5
+    with pytest.raises(TypeError):
+        v_conf.columns('route', ['tag'])
+    with pytest.raises(KeyError):
+        v_conf.columns('route', ['unknown'])
+
+    class OptVPort(m_c.OptVInt):
+        def value_parse(self, iv: str) -> int:
+            v = super().value_parse(iv)
+            if v > 65535:
+                raise ValueError(f'Port is out of range: {v}')
+            return v
+
+    v_conf = m_c.Config(['l_route' >> m_c.OptList() << ['port' >> OptVPort(iv_default=80)]])
+    v_conf.load_dicts([{'route': [{'port': 1}, {'port': 70000}]}])
+    with pytest.raises(ValueError):
+        [v['port'] for v in v_conf.slice('route')]
+    with pytest.raises(ValueError):
+        v_conf.columns('route', ['port'])
+    v_conf.load_dicts([{'route': [{'port': 1}, {'port': '2K'}, {}]}])
+    assert v_conf.columns('route', ['port'])['port'].tolist() == [1, 2000, 80]
+
+
+def test_config_lazy():
+    import dataclasses
+    l_call: list = []
+
+    def routing():
+        l_call.append('routing')
+        return {'route': {'name': 'generated'}}
+
+    def section_get(iv_name):
+        l_call.append(iv_name)
+        if iv_name == 'broken':
+            raise OSError('decrypt failed')
+        return {'name': f'{iv_name}-secret'}
+
+    @dataclasses.dataclass
+    class Main:
+        name: str
+
+    v_conf = m_c.Config([
+        'main' >> m_c.Section() << ['v_name', 'opt' >> m_c.OptValue() << ['v_kind']],
+        'route' >> m_c.Section() << ['v_name'], 'db' >> m_c.Section() << ['v_name'],
+        'broken' >> m_c.Section() << ['v_name']])
+    v_secret = m_c.LazySource(section_get, ['db', 'broken'])
+    v_conf.load_dicts([routing, v_secret, {'main': {'name': 'top', 'opt': {'v': 'o'}}}])
+    assert v_conf['main/name'] == 'top'
+    assert v_conf.get_many(['main/name', 's_main/v_name', 'main/opt']) == ['top', 'top', 'o']
+    v_sc = v_conf.knot('main')
+    assert v_sc['name'] == 'top' and v_sc.get_many(['name']) == ['top'] and v_sc.bind(Main) == Main('top')
+    assert v_sc.knot('opt').v == 'o' and v_conf.knot('main/opt').v == 'o'
+    assert l_call == []
+    assert v_conf['db/name'] == 'db-secret'
+    assert l_call == ['db'] and v_secret.is_loaded('db') and not v_secret.is_loaded('broken')
+    assert v_conf['route/name'] == 'generated'
+    assert l_call == ['db', 'routing']
+    assert v_conf.knot('db')['name'] == 'db-secret'
+    assert l_call == ['db', 'routing']
+    for _ in range(2):
+        with pytest.raises(OSError):
+            v_conf['broken/name']
+    assert l_call == ['db', 'routing', 'broken', 'broken']
+
+
+def test_config_files(tmp_path):
+    import json
+    import time
+    v_fl_base = tmp_path / 'base.yaml'
+    v_fl_base.write_text('main: {name: base, port: 1}\n')
+    v_fl_over = tmp_path / 'over.json'
+    v_fl_over.write_text(json.dumps({'main': {'port': 2}}))
+    v_conf = m_c.Config(['main' >> m_c.Section() << ['v_name', 'port' >> m_c.OptVInt()]])
+    v_conf.load_files([str(v_fl_base), str(v_fl_over)])
+    assert v_conf['main/name'] == 'base'
+    assert v_conf['main/port'] == 2
+    v_state = v_conf.state
+    assert v_conf.files_refresh() == set()
+    assert v_conf.state is v_state
+    v_fl_over.write_text(json.dumps({'main': {'port': 42}}))
+    assert v_conf.files_refresh() == {'main/port'}
+    assert v_conf['main/port'] == 42
+    l_notify: list = []
+    v_conf.subscribe('main', l_notify.append)
+    v_watcher = v_conf.watch(0.01)
+    v_fl_base.write_text('main: {name: watched}\n')
+    for _ in range(500):
+        if len(l_notify):
+            break
+        time.sleep(0.01)
+    v_watcher.stop()
+    assert not v_watcher.is_alive()
+    assert l_notify == [{'main/name'}]
+    assert v_conf['main/name'] == 'watched'
+
+
+@pytest.mark.parametrize('iv_pool', [None, 'thread', 'process'])
+def test_config_files_parallel(tmp_path, iv_pool):
+    import concurrent.futures
+    l_path: list = []
+    for v_idx in range(6):
+        v_fl = tmp_path / f'layer{v_idx}.yaml'
+        v_fl.write_text(f'main: {{port: {v_idx}, name{v_idx % 2}: n{v_idx}}}\n')
+        l_path.append(str(v_fl))
+    v_conf = m_c.Config(['main' >> m_c.Section() << ['v_name0', 'v_name1', 'port' >> m_c.OptVInt()]])
+    if iv_pool is None:
+        l_time = v_conf.load_files(l_path)
+    else:
+        v_pool_t = concurrent.futures.ThreadPoolExecutor if iv_pool == 'thread' else \
+            concurrent.futures.ProcessPoolExecutor
+        with v_pool_t(2) as v_exec:
+            l_time = v_conf.load_files(l_path, iv_executor=v_exec)
+    assert list(l_time) == l_path
+    assert all(v >= 0.0 for v in l_time.values())
+    assert v_conf['main/port'] == 5
+    assert (v_conf['main/name0'], v_conf['main/name1']) == ('n4', 'n5')
+    (tmp_path / 'layer3.yaml').write_text('main: {port: [broken\n')
+    with pytest.raises(Exception):
+        v_conf.files_refresh()
+    assert v_conf['main/name1'] == 'n5'
+
+
+@pytest.mark.parametrize('iv_frozen', [False, True])
+def test_config_files_cache(tmp_path, iv_frozen):
+    import json
+    import os
+    l_parsed: list = []
+
+    def loader(iv_path):
+        l_parsed.append(iv_path)
+        with open(iv_path) as v_fl:
+            return json.load(v_fl)
+
+    def conf_create(iv_default=1):
+        return m_c.Config(['main' >> m_c.Section() << [
+            'v_name', 'port' >> m_c.OptVInt(iv_default=iv_default), 'l_host' >> m_c.OptList(iv_required=False)]])
+
+    v_fl_base = tmp_path / 'base.json'
+    v_fl_base.write_text(json.dumps({'main': {'name': 'base', 'host': ['a', 'b']}}))
+    v_fl_over = tmp_path / 'over.json'
+    v_fl_over.write_text(json.dumps({'main': {'name': 'over'}}))
+    l_path: list = [str(v_fl_base), str(v_fl_over)]
+    v_cache = str(tmp_path / 'conf.cache')
+    v_conf = conf_create()
+    v_conf.load_files(l_path, loader, iv_frozen, iv_cache_path=v_cache)
+    assert len(l_parsed) == 2 and os.path.exists(v_cache)
+    v_conf = conf_create()
+    assert v_conf.load_files(l_path, loader, iv_frozen, iv_cache_path=v_cache) == {v: 0.0 for v in l_path}
+    assert len(l_parsed) == 2
+    assert v_conf.frozen == iv_frozen
+    assert (v_conf['main/name'], v_conf['main/port'], v_conf['main/host']) == ('over', 1, ['a', 'b'])
+    assert [v.v for v in v_conf.slice('main/host')] == ['a', 'b']
+    os.utime(v_fl_over, ns=(1, 1))
+    conf_create().load_files(l_path, loader, iv_frozen, iv_cache_path=v_cache)
+    assert len(l_parsed) == 2
+    v_fl_over.write_text(json.dumps({'main': {'name': 'changed'}}))
+    v_conf = conf_create()
+    v_conf.load_files(l_path, loader, iv_frozen, iv_cache_path=v_cache)
+    assert len(l_parsed) == 4
+    assert v_conf['main/name'] == 'changed'
+    v_conf = conf_create(2)
+    v_conf.load_files(l_path, loader, iv_frozen, iv_cache_path=v_cache)
+    assert len(l_parsed) == 6
+    assert v_conf['main/port'] == 2
+    with open(v_cache, 'wb') as v_fl:
+        v_fl.write(b'garbage')
+    v_conf = conf_create(2)
+    v_conf.load_files(l_path, loader, iv_frozen, iv_cache_path=v_cache)
+    assert v_conf['main/name'] == 'changed'
+    assert not any(v.name.startswith('.conflex-') for v in tmp_path.iterdir())
+
+    class OptScaled(m_c.OptVInt):
+        def __init__(self, scale: int):
+            super().__init__()
+            self.scale = scale
+
+        def value_parse(self, iv) -> int:
+            return super().value_parse(iv) * self.scale
+
+    v_fl_base.write_text(json.dumps({'main': {'port': 5}}))
+    for v_scale in (2, 3):
+        v_conf = m_c.Config(['main' >> m_c.Section() << ['port' >> OptScaled(v_scale)]])
+        v_conf.load_files([str(v_fl_base)], loader, iv_frozen, iv_cache_path=v_cache)
+        assert v_conf['main/port'] == 5 * v_scale
+
+
+def test_config_profile():
+    v_conf = m_c.Config(['main' >> m_c.Section() << [
+        'v_a', 'b' >> m_c.OptVInt(iv_default=3), 'v_c', 'v_unused', 'l_item' >> m_c.OptList() << ['v_x']]])
+    v_conf.load_dicts([{'main': {'a': '1', 'item': [{'x': 'p'}, {'x': 'q'}]}}, {'main': {'c': '2'}}])
+    v_cls: type = type(v_conf)
+    v_prof = v_conf.profile_start()
+    assert isinstance(v_prof, m_c.Profiler) and v_conf.profile_start() is v_prof
+    for _ in range(3):
+        assert v_conf['main/a'] == '1'
+    assert v_conf['main/b'] == 3 and v_conf['main/v_c'] == '2'
+    assert v_conf.knot('main')['a'] == '1'
+    assert [v['x'] for v in v_conf.slice('main/item')] == ['p', 'q']
+    l_entry: dict = {v.path: v for v in v_prof.report()}
+    assert v_prof.report()[0].path == 'main/a'
+    assert l_entry['main/a'][1:3] == (4, 1) and l_entry['main/a'].layer_cnt == {0: 4}
+    assert l_entry['main/a'].resolve_time > 0 and l_entry['main/a'].parse_time > 0
+    assert l_entry['main/b'].default_cnt == 1 and l_entry['main/b'].layer_cnt == {}
+    assert l_entry['main/c'].layer_cnt == {1: 1}
+    assert l_entry['main/item/x'].read_cnt == 2
+    assert v_prof.unread() == ['main/unused', 'main/item']
+    assert v_prof.as_dict()['options']['main/c']['layer_cnt'] == {'1': 1}
+    v_conf.freeze()
+    v_conf['main/a']
+    assert v_prof.report()[0].read_cnt == 5
+    assert v_conf.profile_stop() is v_prof and type(v_conf) is v_cls
+    v_conf['main/a']
+    assert v_prof.report()[0].read_cnt == 5 and v_conf.profile_stop() is None
+
+
+def test_config_profile_bulk():
+    import dataclasses
+    from typing import Tuple
+
+    @dataclasses.dataclass
+    class Item:
+        x: str
+
+    @dataclasses.dataclass
+    class Main:
+        c: str
+        item: Tuple[Item, ...]
+
+    v_conf = m_c.Config(['main' >> m_c.Section() << [
+        'v_a', 'b' >> m_c.OptVInt(iv_default=3), 'v_c', 'l_item' >> m_c.OptList() << ['v_x']]])
+    v_conf.load_dicts([{'main': {'a': '1', 'item': [{'x': 'p'}, {'x': 'q'}]}}, {'main': {'c': '2'}}])
+    v_prof = v_conf.profile_start()
+    assert v_conf.get_many(['main/a', 'main/b']) == ['1', 3]
+    l_entry: dict = {v.path: v for v in v_prof.report()}
+    assert l_entry['main/a'][1:3] == (1, 1) and l_entry['main/a'].layer_cnt == {0: 1}
+    assert l_entry['main/b'].default_cnt == 1
+    assert v_prof.unread() == ['main/c', 'main/item', 'main/item/x']
+    v_prof.clear()
+    assert v_conf.knot('main').bind(Main) == Main('2', (Item('p'), Item('q')))
+    l_entry = {v.path: v for v in v_prof.report()}
+    assert l_entry['main/c'].layer_cnt == {1: 1} and l_entry['main/item/x'].read_cnt == 2
+    assert v_prof.unread() == ['main/a', 'main/b', 'main/item']
+    v_prof.clear()
+    assert list(v_conf.values())[:3] == ['1', 3, '2']
+    assert v_prof.unread() == []
+    v_prof.clear()
+    assert dict(v_conf.knot('main').items())['c'] == '2'
+    assert v_prof.unread() == [] and {v.path: v for v in v_prof.report()}['main/c'].layer_cnt == {1: 1}
+    v_conf.profile_stop()
+    assert type(v_conf.items()) is m_c.main.ConfigItemsView
+
+
+def test_config_layer_index():
+    v_conf = m_c.Config(['main' >> m_c.Section() << [
+        'v_a', 'b' >> m_c.OptVInt(iv_default=3), 'l_item' >> m_c.OptList() << ['v_x'],
+        'l_none' >> m_c.OptList(iv_required=False) << ['y' >> m_c.OptValue(iv_default='?')]]])
+    l_layer: list = [
+        {'main': {'a': f'a{v}', 'item': [{'x': f'x{v}'}] * (v + 1)}} if v % 2 == 0 else {'other': {}}
+        for v in range(6)]
+    v_conf.load_dicts(l_layer)
+    v_st = v_conf.state
+    assert v_st.layer_l['main/a'] == (0, 2, 4) and 'main/b' not in v_st.layer_l
+    assert v_st.layer_l['main/item/x'] == (0, 2, 4)
+    assert v_conf['main/a'] == 'a4' and v_conf['main/b'] == 3
+    assert v_conf.knot('main').state.layer_l is v_st.layer_l and v_conf.knot('main')['a'] == 'a4'
+    assert [v['x'] for v in v_conf.slice('main/item')] == ['x4'] * 5
+    assert [v['y'] for v in v_conf.slice('main/none')] == ['?']
+    assert dict(v_conf.items()) == {
+        'main/a': 'a4', 'main/b': 3, 'main/item': [None] * 5, 'main/item/x': ['x4'] * 5, 'main/none': [],
+        'main/none/y': ['?']}
+    assert v_conf.reload_dicts(l_layer[:4] + [{'other': {}}, {'main': {'b': '7'}}]) == {
+        'main/a', 'main/b', 'main/item', 'main/item/x'}
+    v_st = v_conf.state
+    assert v_st.layer_l['main'] == (0, 2, 5) and v_st.layer_l['main/a'] == (0, 2) and v_st.layer_l['main/b'] == (5,)
+    assert v_conf['main/a'] == 'a2' and [v['x'] for v in v_conf.slice('main/item')] == ['x2'] * 3
+    v_conf.reload_dicts(l_layer)
+    v_conf.freeze()
+    assert v_conf['main/a'] == 'a4' and v_conf.state.layer_l is not None
+    assert v_conf.reload_dicts(l_layer[:5] + [{'main': {'b': '7'}}]) == {'main/b'}
+    assert v_conf.state.layer_l['main/b'] == (5,) and v_conf['main/b'] == 7
+    v_conf.load_dicts(l_layer, iv_frozen=True)
+    assert v_conf.state.layer_l is None and v_conf['main/a'] == 'a4'
+    assert [v['x'] for v in v_conf.slice('main/item')] == ['x4'] * 5
+    v_conf.load_dicts(l_layer[:5] + [lambda: {'main': {'a': 'lazy'}}])
+    assert v_conf.state.layer_l is None and v_conf['main/a'] == 'lazy'
+    v_conf.load_dicts(l_layer[:3])
+    assert v_conf.state.layer_l is None and v_conf['main/a'] == 'a2'
+    assert [v['y'] for v in v_conf.slice('main/none')] == ['?']
+    v_conf = m_c.Config(['complex' >> m_c.OptValue() << ['v_kind']])
+    v_conf.load_dicts([{}] * 4)
+    v_sc = v_conf.knot('complex')
+    v_sc.load_dicts([{'complex': {'v': 'low'}}] * 4 + [{}])
+    assert v_sc.state.layer_l['complex'] == (0, 1, 2, 3) and v_sc.v == 'low'
+
+
+@pytest.mark.parametrize('iv_path', ['main/sub', 'main/out/sub'])
+def test_config_layer_index_slice(monkeypatch, iv_path):
+    l_tree: list = ['main' >> m_c.Section() << [
+        'l_out' >> m_c.OptList(iv_required=False) << [
+            'l_sub' >> m_c.OptList(iv_required=False) << ['p' >> m_c.OptValue(iv_default='-')]],
+        'l_sub' >> m_c.OptList(iv_required=False) << [
+            'p' >> m_c.OptValue(iv_default='-'), 'deep' >> m_c.Section() << ['r' >> m_c.OptValue(iv_default='-')]]]]
+    l_layer: list = [
+        {'main': {'sub': [{'p': 1}, {'p': 2}], 'out': [{}, {'sub': {'p': 'd'}}]}},
+        {'main': {'sub': {'deep': {'r': 'top'}}, 'out': [{}, {}, {}]}},
+        {'main': {'sub': [], 'out': [{'sub': []}]}}]
+
+    def slice_get(il_source):
+        v_conf = m_c.Config(l_tree)
+        v_conf.load_dicts(il_source)
+        return [(v['p'], v['deep/r'] if iv_path == 'main/sub' else None) for v in v_conf.slice(iv_path)]
+
+    for v_cnt in range(len(l_layer) + 1):
+        l_source: list = [{}] * 4 + l_layer[:v_cnt]
+        monkeypatch.setattr(m_c.main, 'gv_layer_index_min', 100)
+        l_probe: list = slice_get(l_source)
+        monkeypatch.setattr(m_c.main, 'gv_layer_index_min', 1)
+        assert slice_get(l_source) == l_probe
+
+
+def test_opt_parse_memo():
+    v_conf = m_c.Config(['l_route' >> m_c.OptList() << [
+        'v_host', 'size' >> m_c.OptVInt(), 'weight' >> m_c.OptVFloat(), 'l_port' >> m_c.OptLInt()]])
+    l_route: list = [
+        {'host': ''.join(['h', 'ost']), 'size': ''.join(['2', 'KB']), 'weight': '0.5', 'port': ['8K', 8080]}
+        for _ in range(3)]
+    v_conf.load_dicts([{'route': l_route}])
+    l_item: list = list(v_conf.slice('route'))
+    assert l_item[0]['size'] == 2048 and l_item[0]['port'] == [8000, 8080] and l_item[0]['weight'] == 0.5
+    assert l_item[0]['host'] == 'host' and l_item[0]['host'] is l_item[2]['host']
+    assert l_item[0]['size'] is l_item[1]['size'] and l_item[0]['port'][0] is l_item[2]['port'][0]
+    assert v_conf['route/host'][1] is v_conf['route/host'][2]
+    assert m_c.OptVInt().value_parse('3MB') == 3 * 1024 * 1024 and m_c.OptVInt().value_parse('3M') == 3000000
+    with pytest.raises(ValueError):
+        m_c.OptVInt().value_parse('3XB')
+
+
+def test_config_flat_source():
+    v_conf = m_c.Config(['main' >> m_c.Section() << [
+        'packet_size' >> m_c.OptVInt(iv_default=1), 'v_name', 'l_port' >> m_c.OptLInt(),
+        'complex' >> m_c.OptValue() << ['v_kind']]])
+    l_base: dict = {'main': {'packet_size': '1KB', 'name': 'a', 'port': [1], 'complex': {'v': 'ok', 'kind': 'k'}}}
+    v_flat = m_c.FlatSource.from_text(['main/v_packet_size=2KB', 's_main/complex=over', 'main/l_port=5'])
+    assert v_flat['main']['v_packet_size'] == '2KB' and list(v_flat['s_main']) == ['complex']
+    assert v_flat['s_main']['complex'] is v_flat['s_main']['complex']
+    v_conf.load_dicts([l_base, v_flat])
+    assert v_conf['main/packet_size'] == 2048 and v_conf['main/port'] == [5] and v_conf['main/name'] == 'a'
+    assert v_conf['main/complex'] == 'over' and v_conf['main/complex/kind'] == 'k'
+    assert v_conf.knot('main/complex').v == 'over'
+    l_flat_same: dict = {'main/packet_size': '2KB', 'main/complex': 'over', 'main/port': '5'}
+    assert v_conf.reload_dicts([l_base, m_c.FlatSource(l_flat_same)]) == set()
+    assert v_conf.reload_dicts([l_base, m_c.FlatSource({'main/complex/kind': 'flat'})]) == {
+        'main/packet_size', 'main/port', 'main/complex', 'main/complex/kind'}
+    # Same as the nested source {'main': {'complex': {'kind': 'flat'}}}: the node exists, but has no value.
+    assert v_conf['main/complex'] is None and v_conf['main/complex/kind'] == 'flat'
+    with pytest.raises(KeyError):
+        v_conf.load_dicts([m_c.FlatSource({'main/unknown': '1'})])
+    with pytest.raises(ValueError):
+        m_c.FlatSource.from_text(['main/name'])
+    v_flat = m_c.FlatSource({'main.port': 1, 's_main.complex.kind': 'dot'}, iv_sep='.')
+    assert list(v_flat['main']) == ['port'] and v_flat['s_main']['complex']['kind'] == 'dot'
+    v_conf.load_dicts([l_base, v_flat, m_c.FlatSource.from_text(['main.v_name=b'], iv_sep='.')])
+    assert v_conf['main/port'] == [1] and v_conf['main/complex/kind'] == 'dot' and v_conf['main/name'] == 'b'
+
+
+def test_config_shared(tmp_path):
+    l_tree: list = ['main' >> m_c.Section() << [
+        'size' >> m_c.OptVInt(), 'v_name', 'l_port' >> m_c.OptLInt(iv_storage='array'),
+        'bad' >> m_c.OptVInt(iv_default=1), 'complex' >> m_c.OptValue() << ['v_kind']]]
+    v_conf = m_c.Config(l_tree)
+    v_conf.load_dicts([{'main': {
+        'size': '2KB', 'name': 'x', 'port': [1, 2], 'bad': 'zz', 'complex': {'v': 'ok', 'kind': 'k'}}}])
+    with m_c.SharedPublisher('conf', str(tmp_path)) as v_pub:
+        with pytest.raises(LookupError):
+            m_c.SharedConfig('conf', str(tmp_path))['main/size']
+        assert v_pub.publish(v_conf) == 1 and not v_conf.frozen
+        v_shared = m_c.SharedConfig('conf', str(tmp_path), l_tree)
+        assert v_shared.generation == 1
+        assert v_shared['main/size'] == 2048 and v_shared['main/v_name'] == 'x'
+        assert v_shared['main/port'].tolist() == [1, 2] and v_shared['main/port'].readonly
+        assert v_shared.knot('main/complex').v == 'ok' and dict(v_shared.knot('s_main/complex')) == {'kind': 'k'}
+        assert list(v_shared.knot('main')) == ['size', 'name', 'port', 'bad', 'complex', 'complex/kind']
+        with pytest.raises(ValueError):
+            v_shared['main/bad']
+        with pytest.raises(TypeError):
+            v_shared['main']
+        v_shared_raw = m_c.SharedConfig('conf', str(tmp_path))
+        with pytest.raises(KeyError):
+            v_shared_raw['main/v_name']
+        v_conf.load_dicts([{'main': {'size': '3KB'}}], iv_frozen=True)
+        assert v_pub.publish(v_conf) == 2
+        assert sorted(v.name for v in tmp_path.iterdir()) == ['conf', 'conf.2']
+        assert v_shared['main/size'] == 3072 and v_shared.generation == 2 and v_shared_raw['main/size'] == 3072
+        with pytest.raises(KeyError):
+            v_shared['main/name']
+        v_shared.close()
+        v_shared_raw.close()
+    assert list(tmp_path.iterdir()) == []